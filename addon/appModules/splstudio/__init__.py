@@ -38,6 +38,10 @@ from . import splconfig
 from . import splconfui
 from . import splmisc
 from . import splactions
+from . import spldebugging
+from . import spltimers
+from . import splcomments
+from . import splheartbeat
 import addonHandler
 addonHandler.initTranslation()
 from .spldebugging import debugOutput
@@ -48,10 +52,9 @@ rangeGen = range if py3 else xrange
 # Make sure the broadcaster is running a compatible version.
 SPLMinVersion = "5.10"
 
-# Threads pool.
+# Threads pool (18.12: microphone alarm timers come from add-on timer wheel).
 micAlarmT = None
 micAlarmT2 = None
-libScanT = None
 
 # Blacklisted versions of Studio where library scanning functionality is broken.
 noLibScanMonitor = []
@@ -76,9 +79,9 @@ def micAlarmManager(micAlarmWav, micAlarmMessage):
 	global micAlarmT2
 	# Use a timer to play a tone when microphone was active for more than the specified amount.
 	# Mechanics come from Clock add-on.
+	# 18.12: managed by add-on timer wheel.
 	if splconfig.SPLConfig["MicrophoneAlarm"]["MicAlarmInterval"]:
-		micAlarmT2 = wx.PyTimer(_micAlarmAnnouncer)
-		micAlarmT2.Start(splconfig.SPLConfig["MicrophoneAlarm"]["MicAlarmInterval"] * 1000)
+		micAlarmT2 = spltimers.callEvery(splconfig.SPLConfig["MicrophoneAlarm"]["MicAlarmInterval"], _micAlarmAnnouncer)
 
 # Category sounds dictionary (key = category, value = tone pitch).
 _SPLCategoryTones = {
@@ -192,19 +195,16 @@ class SPLStudioTrackItem(SPLTrackItem):
 		# LTS: Comments please.
 		if splconfig.SPLConfig["General"]["TrackCommentAnnounce"] != "off":
 			self.announceTrackComment(0)
-		# 6.3: Catch an unusual case where screen order is off yet column order is same as screen order and NvDA is told to announce all columns.
 		# 17.04: Even if vertical column commands are performed, build description pieces for consistency.
-		if splconfig._shouldBuildDescriptionPieces():
+		# 18.12: columns to be announced are compiled when a profile loads or switches, so just read the cells.
+		columnAnnouncementPlan = splconfig.SPLConfig.columnAnnouncementPlan
+		if columnAnnouncementPlan is not None:
+			includeColumnHeaders, columns = columnAnnouncementPlan
 			descriptionPieces = []
-			columnsToInclude = splconfig.SPLConfig["ColumnAnnouncement"]["IncludedColumns"]
-			includeColumnHeaders = splconfig.SPLConfig["ColumnAnnouncement"]["IncludeColumnHeaders"]
-			for header in splconfig.SPLConfig["ColumnAnnouncement"]["ColumnOrder"]:
-				if header in columnsToInclude:
-					index = self.indexOf(header)
-					if index is None: continue # Header not found, mostly encountered in Studio 5.0x.
-					content = self._getColumnContentRaw(index)
-					if content:
-						descriptionPieces.append("%s: %s"%(header, content) if includeColumnHeaders else content)
+			for index, header in columns:
+				content = self._getColumnContentRaw(index)
+				if content:
+					descriptionPieces.append("%s: %s"%(header, content) if includeColumnHeaders else content)
 			self.description = ", ".join(descriptionPieces)
 		if self.appModule._announceColumnOnly is None:
 			super(IAccessible, self).reportFocus()
@@ -345,20 +345,22 @@ class SPLStudioTrackItem(SPLTrackItem):
 	# 0 indicates reportFocus, subsequent levels indicate script repeat count+1.
 	def announceTrackComment(self, level):
 		filename = self._getColumnContentRaw(self.indexOf("Filename"))
-		if filename is not None and filename in splconfig.trackComments:
+		# 18.12: look up the comment once, as comments are kept in the track comments store.
+		comment = splconfig.trackComments.get(filename) if filename is not None else None
+		if comment is not None:
 			if level == 0:
 				if splconfig.SPLConfig["General"]["TrackCommentAnnounce"] in ("message", "both"):
 					ui.message(_("Has comment"))
 				if splconfig.SPLConfig["General"]["TrackCommentAnnounce"] in ("beep", "both"):
 					tones.beep(1024, 100)
 			elif level == 1:
-				ui.message(splconfig.trackComments[filename])
+				ui.message(comment)
 			elif level == 2:
-				api.copyToClip(splconfig.trackComments[filename])
+				api.copyToClip(comment)
 				# Translators: Presented when track comment has been copied to clipboard.
 				ui.message(_("Track comment copied to clipboard"))
 			else:
-				self._trackCommentsEntry(filename, splconfig.trackComments[filename])
+				self._trackCommentsEntry(filename, comment)
 		else:
 			if level in (1, 2):
 				# Translators: Presented when there is no track comment for the focused track.
@@ -380,7 +382,8 @@ class SPLStudioTrackItem(SPLTrackItem):
 		def callback(result):
 			if result == wx.ID_OK:
 				if dlg.GetValue() is None: return
-				elif dlg.GetValue() == "": del splconfig.trackComments[filename]
+				elif dlg.GetValue() == "":
+					if filename in splconfig.trackComments: del splconfig.trackComments[filename]
 				else: splconfig.trackComments[filename] = dlg.GetValue()
 		gui.runScriptModalDialog(dlg, callback)
 
@@ -629,7 +632,6 @@ class AppModule(appModuleHandler.AppModule):
 	SPLCurVersion = appModuleHandler.AppModule.productVersion
 	_focusedTrack = None
 	_announceColumnOnly = None # Used only if vertical column navigation commands are used.
-	_SPLStudioMonitor = None # Monitor Studio API routines.
 
 	# Prepare the settings dialog among other things.
 	def __init__(self, *args, **kwargs):
@@ -637,6 +639,8 @@ class AppModule(appModuleHandler.AppModule):
 		if self.SPLCurVersion < SPLMinVersion:
 			raise RuntimeError("Unsupported version of Studio is running, exiting app module")
 		debugOutput("Using SPL Studio version %s"%self.SPLCurVersion)
+		# 18.12: time startup phases if told to do so via command line.
+		spldebugging.beginStartupProfile()
 		# #84: if foreground object is defined, this is a true Studio start, otherwise this is an NVDA restart with Studio running.
 		# The latter is possible because app module constructor can run before NVDA finishes initializing, particularly if system focus is located somewhere other than Taskbar.
 		# Note that this is an internal implementation detail and is subject to change without notice.
@@ -652,6 +656,10 @@ class AppModule(appModuleHandler.AppModule):
 		splactions.SPLActionProfileSwitched.register(self.actionProfileSwitched)
 		debugOutput("loading add-on settings")
 		splconfig.initialize()
+		# 18.12: library scan rate, estimated time to completion and scan history.
+		self.libraryScanTelemetry = splmisc.LibraryScanTelemetry(path=os.path.join(globalVars.appArgs.configPath, "splscanhistory.json"))
+		# 18.12: listener counts during time-based profiles.
+		self.listenerCountSampler = splmisc.ListenerCountSampler()
 		# Announce status changes while using other programs.
 		# This requires NVDA core support and will be available in 6.0 and later (cannot be ported to earlier versions).
 		# For now, handle all background events, but in the end, make this configurable.
@@ -687,7 +695,8 @@ class AppModule(appModuleHandler.AppModule):
 			debugOutput("add-on update check not possible")
 		else:
 			debugOutput("starting update check")
-			splupdate.initialize()
+			with spldebugging.startupPhase("update check"):
+				splupdate.initialize()
 		# Display startup dialogs if any.
 		# 17.10: not when minimal startup flag is set.
 		# 18.08.1: sometimes, wxPython 4 says wx.App isn't ready.
@@ -698,27 +707,34 @@ class AppModule(appModuleHandler.AppModule):
 
 	# Locate the handle for main window for caching purposes.
 	def _locateSPLHwnd(self):
-		hwnd = user32.FindWindowW(u"SPLStudio", None)
-		while not hwnd:
-			time.sleep(1)
-			# If the demo copy expires and the app module begins, this loop will spin forever.
-			# Make sure this loop catches this case.
-			if self.noMoreHandle.isSet():
-				self.noMoreHandle.clear()
-				self.noMoreHandle = None
-				return
+		with spldebugging.startupPhase("Studio window handle"):
 			hwnd = user32.FindWindowW(u"SPLStudio", None)
+			while not hwnd:
+				time.sleep(1)
+				# If the demo copy expires and the app module begins, this loop will spin forever.
+				# Make sure this loop catches this case.
+				if self.noMoreHandle.isSet():
+					self.noMoreHandle.clear()
+					self.noMoreHandle = None
+					return
+				hwnd = user32.FindWindowW(u"SPLStudio", None)
 		# Only this thread will have privilege of notifying handle's existence.
 		with threading.Lock() as hwndNotifier:
 			splbase._SPLWin = hwnd
 			debugOutput("Studio handle is %s"%hwnd)
 		# #41 (18.04): start background monitor.
 		# 18.08: unless Studio is exiting.
+		# 18.12: Studio heartbeat samples Studio API values for subscribers.
 		try:
-			self._SPLStudioMonitor = wx.PyTimer(self.studioAPIMonitor)
-			wx.CallAfter(self._SPLStudioMonitor.Start, 1000)
+			splheartbeat.subscribe("libraryScan", self._heartbeatLibraryScan, changesOnly=False)
+			splheartbeat.subscribe("playlistItemCount", self._heartbeatPlaylistItemCount)
+			splheartbeat.heartbeat.start()
 		except:
 			pass
+		# 18.12: the app module is fully ready, so let others know and close the startup profile.
+		# Startup dialogs were queued before this thread started, hence the profile will include them.
+		wx.CallAfter(spldebugging.notifyAction, splactions.SPLActionAppReady, "SPLActionAppReady")
+		wx.CallAfter(spldebugging.endStartupProfile)
 		# Remind me to broadcast metadata information.
 		# 18.04: also when delayed action is needed because metadata action handler couldn't locate Studio handle itself.
 		if splconfig.SPLConfig["General"]["MetadataReminder"] == "startup" or splmisc._delayMetadataAction:
@@ -740,20 +756,22 @@ class AppModule(appModuleHandler.AppModule):
 
 	# Studio API heartbeat.
 	# Although useful for library scan detection, it can be extended to cover other features.
+	# 18.12: Studio heartbeat (see splheartbeat module) samples Studio API values and calls the below subscribers.
 
-	def studioAPIMonitor(self):
-		# Only proceed if Studio handle is valid.
-		if not user32.FindWindowW(u"SPLStudio", None):
-			if self._SPLStudioMonitor is not None:
-				self._SPLStudioMonitor.Stop()
-				self._SPLStudioMonitor = None
-				return
+	def _heartbeatLibraryScan(self, scanCount, previous):
+		# 18.12: scan counts feed library scan telemetry.
+		if scanCount >= 0: self.libraryScanTelemetry.sample(scanCount)
+		elif self.libraryScanTelemetry.scanning: self._completedLibraryScan = self.libraryScanTelemetry.finish(splbase.studioAPI(0, 32))
 		# #41 (18.04): background library scan detection.
 		# Thankfully, current lib scan reporter function will not proceed when library scan is happening via Insert Tracks dialog.
-		if splbase.studioAPI(1, 32) >= 0:
-			if not self.libraryScanning: self.script_libraryScanMonitor(None)
+		if scanCount >= 0 and not self.libraryScanning:
+			self.script_libraryScanMonitor(None)
+		elif self._libraryScanReporting:
+			self.libraryScanReporter(scanCount)
+
+	def _heartbeatPlaylistItemCount(self, itemCount, previous):
 		# #86 (18.12/18.09.6-LTS): certain internal markers require presence of a playlist, otherwise unexpected things may happen.
-		if not splbase.studioAPI(0, 124):
+		if not itemCount:
 			if self._focusedTrack is not None: self._focusedTrack = None
 			if self._analysisMarker is not None: self._analysisMarker = None
 
@@ -767,6 +785,12 @@ class AppModule(appModuleHandler.AppModule):
 	def event_foreground(self, obj, nextHandler):
 		if not self._initStudioWindowFocused.isSet() and obj.windowClassName == "TStudioForm":
 			self._initStudioWindowFocused.set()
+			# 18.12: status objects are looked up when Studio window shows up for the first time.
+			try:
+				self.prefetchStatusObjs(studioWindow=obj)
+			except:
+				from logHandler import log
+				log.debugWarning("SPL: cannot prefetch status objects", exc_info=True)
 		nextHandler()
 
 	def event_NVDAObject_init(self, obj):
@@ -837,43 +861,98 @@ class AppModule(appModuleHandler.AppModule):
 			return splconfig.SPLConfig["SayStatus"]["SayPlayingCartName"]
 		return True
 
+	# 18.12: status bar name change coalescing.
+	# During library scans, Studio changes status bar text for every file, so within a set window (in milliseconds), only the latest change for each status bar child is processed.
+	# The first change is processed right away, and the latest change (if any) when the window ends.
+	# Keys are (window handle, child ID) pairs.
+	_statusBarWindows = {}
+	_statusBarPending = {}
+	_statusBarDropped = {}
+	# Number of status bar changes skipped since Studio started.
+	statusBarChangesDropped = 0
+
+	# Returns True if this status bar change should be processed now.
+	def _coalesceStatusBarChange(self, obj):
+		window = splconfig.SPLConfig["Advanced"]["StatusBarCoalescing"]
+		if not window: return True
+		key = (obj.windowHandle, obj.IAccessibleChildID)
+		if key not in self._statusBarWindows:
+			self._statusBarWindows[key] = spltimers.callLater(window/1000.0, self._flushStatusBarChange, key)
+			return True
+		if key in self._statusBarPending:
+			self._statusBarDropped[key] = self._statusBarDropped.get(key, 0) + 1
+			self.statusBarChangesDropped += 1
+		self._statusBarPending[key] = obj
+		return False
+
+	def _flushStatusBarChange(self, key):
+		obj = self._statusBarPending.pop(key, None)
+		if obj is None:
+			del self._statusBarWindows[key]
+			return
+		# Changes may still be coming in, so start another window.
+		self._statusBarWindows[key] = spltimers.callLater(splconfig.SPLConfig["Advanced"]["StatusBarCoalescing"]/1000.0, self._flushStatusBarChange, key)
+		try:
+			if obj.name: self._statusBarChanged(obj)
+		except:
+			from logHandler import log
+			log.debugWarning("SPL: cannot process status bar change", exc_info=True)
+
+	def _stopStatusBarCoalescing(self):
+		for timer in self._statusBarWindows.values(): timer.Stop()
+		self._statusBarWindows.clear()
+		self._statusBarPending.clear()
+		self._statusBarDropped.clear()
+		debugOutput("status bar changes dropped: %s"%self.statusBarChangesDropped)
+
+	# Announce status bar changes.
+	# 18.12: split from name change event so coalesced changes can be processed later.
+	def _statusBarChanged(self, obj):
+		key = (obj.windowHandle, obj.IAccessibleChildID)
+		# Number of changes to this status bar child skipped since the last one that was processed.
+		dropped = self._statusBarDropped.pop(key, 0)
+		# Only announce changes in status bar objects when told to do so.
+		if not self._TStatusBarChanged(obj): return
+		# Special handling for Play Status
+		if obj.IAccessibleChildID == 1:
+			if "Play status" in obj.name:
+				# Strip off "  Play status: " for brevity only in main playlist window.
+				ui.message(obj.name.split(":")[1][1:])
+			elif "Loading" in obj.name:
+				if splconfig.SPLConfig["General"]["LibraryScanAnnounce"] not in ("off", "ending"):
+					# If library scan is in progress, announce its progress when told to do so.
+					# 18.12: skipped changes are counted, so progress is announced every 100 items as before.
+					previousScanCount = self.scanCount
+					self.scanCount += 1 + dropped
+					if self.scanCount//100 > previousScanCount//100:
+						self._libraryScanAnnouncer(obj.name[1:obj.name.find("]")], splconfig.SPLConfig["General"]["LibraryScanAnnounce"])
+				if not self.libraryScanning:
+					if self.productVersion not in noLibScanMonitor: self.libraryScanning = True
+			elif "match" in obj.name:
+				if splconfig.SPLConfig["General"]["LibraryScanAnnounce"] != "off" and self.libraryScanning:
+					if splconfig.SPLConfig["General"]["BeepAnnounce"]: tones.beep(370, 100)
+					else:
+						# Translators: Presented when library scan is complete.
+						ui.message(_("Scan complete with {scanCount} items").format(scanCount = obj.name.split()[3]))
+				if self.libraryScanning: self.libraryScanning = False
+				self.scanCount = 0
+		else:
+			# 16.12: Because cart edit text shows cart insert status, exclude this from toggle state announcement.
+			if obj.name.endswith((" On", " Off")) and not obj.name.startswith("Cart "):
+				self._toggleMessage(obj.name)
+			else:
+				ui.message(obj.name)
+			if self.cartExplorer or splconfig.SPLConfig["MicrophoneAlarm"]["MicAlarm"]:
+				# Activate mic alarm or announce when cart explorer is active.
+				self.doExtraAction(obj.name)
+
 	# Now the actual event.
 	def event_nameChange(self, obj, nextHandler):
 		# Do not let NvDA get name for None object when SPL window is maximized.
 		if not obj.name:
 			return
-		# Only announce changes in status bar objects when told to do so.
-		if obj.windowClassName == "TStatusBar" and self._TStatusBarChanged(obj):
-			# Special handling for Play Status
-			if obj.IAccessibleChildID == 1:
-				if "Play status" in obj.name:
-					# Strip off "  Play status: " for brevity only in main playlist window.
-					ui.message(obj.name.split(":")[1][1:])
-				elif "Loading" in obj.name:
-					if splconfig.SPLConfig["General"]["LibraryScanAnnounce"] not in ("off", "ending"):
-						# If library scan is in progress, announce its progress when told to do so.
-						self.scanCount+=1
-						if self.scanCount%100 == 0:
-							self._libraryScanAnnouncer(obj.name[1:obj.name.find("]")], splconfig.SPLConfig["General"]["LibraryScanAnnounce"])
-					if not self.libraryScanning:
-						if self.productVersion not in noLibScanMonitor: self.libraryScanning = True
-				elif "match" in obj.name:
-					if splconfig.SPLConfig["General"]["LibraryScanAnnounce"] != "off" and self.libraryScanning:
-						if splconfig.SPLConfig["General"]["BeepAnnounce"]: tones.beep(370, 100)
-						else:
-							# Translators: Presented when library scan is complete.
-							ui.message(_("Scan complete with {scanCount} items").format(scanCount = obj.name.split()[3]))
-					if self.libraryScanning: self.libraryScanning = False
-					self.scanCount = 0
-			else:
-				# 16.12: Because cart edit text shows cart insert status, exclude this from toggle state announcement.
-				if obj.name.endswith((" On", " Off")) and not obj.name.startswith("Cart "):
-					self._toggleMessage(obj.name)
-				else:
-					ui.message(obj.name)
-				if self.cartExplorer or splconfig.SPLConfig["MicrophoneAlarm"]["MicAlarm"]:
-					# Activate mic alarm or announce when cart explorer is active.
-					self.doExtraAction(obj.name)
+		if obj.windowClassName == "TStatusBar":
+			if self._coalesceStatusBarChange(obj): self._statusBarChanged(obj)
 		# Monitor the end of track and song intro time and announce it.
 		elif obj.windowClassName == "TStaticText": # For future extensions.
 			if obj.simplePrevious is not None:
@@ -939,8 +1018,9 @@ class AppModule(appModuleHandler.AppModule):
 		if self.cartExplorer and status.startswith("Cart") and status.endswith((" On", " Off")):
 			# 17.01: The best way to detect Cart Edit off is consulting file modification time.
 			# Automatically reload cart information if this is the case.
-			if status in ("Cart Edit Off", "Cart Insert On"):
-				self.carts = splmisc.cartExplorerRefresh(api.getForegroundObject().name, self.carts)
+			# 18.12: cart bank watcher takes care of this, so just ask it to check banks now.
+			if status in ("Cart Edit Off", "Cart Insert On") and self._cartBankWatcher is not None:
+				self._cartBankWatcher.poke()
 			# Translators: Presented when cart modes are toggled while cart explorer is on.
 			ui.message(_("Cart explorer is active"))
 			return
@@ -949,7 +1029,7 @@ class AppModule(appModuleHandler.AppModule):
 		micAlarm = splconfig.SPLConfig["MicrophoneAlarm"]["MicAlarm"]
 		# #38 (17.11/15.10-lts): only enter microphone alarm area if alarm should be turned on.
 		if not micAlarm:
-			if micAlarmT is not None: micAlarmT.cancel()
+			if micAlarmT is not None: micAlarmT.Stop()
 			micAlarmT = None
 			if micAlarmT2 is not None: micAlarmT2.Stop()
 			micAlarmT2 = None
@@ -959,15 +1039,12 @@ class AppModule(appModuleHandler.AppModule):
 			# Translators: Presented when microphone was on for more than a specified time in microphone alarm dialog.
 			micAlarmMessage = _("Warning: Microphone active")
 			# Use a timer to play a tone when microphone was active for more than the specified amount.
+			# 18.12: managed by add-on timer wheel.
 			if status == "Microphone On":
-				micAlarmT = threading.Timer(micAlarm, micAlarmManager, args=[micAlarmWav, micAlarmMessage])
-				try:
-					micAlarmT.start()
-				except RuntimeError:
-					micAlarmT = threading.Timer(micAlarm, messageSound, args=[micAlarmWav, micAlarmMessage])
-					micAlarmT.start()
+				if micAlarmT is not None: micAlarmT.Stop()
+				micAlarmT = spltimers.callLater(micAlarm, micAlarmManager, micAlarmWav, micAlarmMessage)
 			elif status == "Microphone Off":
-				if micAlarmT is not None: micAlarmT.cancel()
+				if micAlarmT is not None: micAlarmT.Stop()
 				micAlarmT = None
 				if micAlarmT2 is not None: micAlarmT2.Stop()
 				micAlarmT2 = None
@@ -976,6 +1053,13 @@ class AppModule(appModuleHandler.AppModule):
 	def actionProfileSwitched(self):
 		# #38 (17.11/15.10-LTS): obtain microphone alarm status.
 		if splbase._SPLWin is not None: self.doExtraAction(self.sayStatus(2, statusText=True))
+		# 18.12: record listener counts while a time-based profile is active and summarize them once the show ends.
+		# Instant switches during the show do not end the session.
+		sampler = self.listenerCountSampler
+		if splconfig.SPLConfig.timedSwitchProfileActive:
+			if not sampler.active: sampler.startSession(splconfig.SPLConfig.activeProfile, splconfig.SPLConfig["Advanced"]["ListenerSampleInterval"])
+		elif sampler.active:
+			splmisc.announceListenerSummary(sampler.endSession())
 
 	# Alarm announcement: Alarm notification via beeps, speech or both.
 	def alarmAnnounce(self, timeText, tone, duration, intro=False):
@@ -1054,7 +1138,7 @@ class AppModule(appModuleHandler.AppModule):
 		splactions.SPLActionAppTerminating.notify()
 		debugOutput("closing microphone alarm/interval thread")
 		global micAlarmT, micAlarmT2
-		if micAlarmT is not None: micAlarmT.cancel()
+		if micAlarmT is not None: micAlarmT.Stop()
 		micAlarmT = None
 		if micAlarmT2 is not None: micAlarmT2.Stop()
 		micAlarmT2 = None
@@ -1067,9 +1151,9 @@ class AppModule(appModuleHandler.AppModule):
 		# #86: track time analysis marker should be gone, too.
 		self._analysisMarker = None
 		# #41: We're done monitoring Studio API.
-		if self._SPLStudioMonitor is not None:
-			self._SPLStudioMonitor.Stop()
-			self._SPLStudioMonitor = None
+		self.listenerCountSampler.endSession()
+		splheartbeat.heartbeat.clear()
+		self._libraryScanReporting = False
 		# #54 (18.04): no more PyDeadObjectError in wxPython 4, so catch ALL exceptions until NVDA stable release with wxPython 4 is out.
 		# 18.08: call appropriate Remove function based on wxPython version in use.
 		# 18.09: use wx.Menu.Remove directly.
@@ -1079,11 +1163,17 @@ class AppModule(appModuleHandler.AppModule):
 			pass
 		# Tell the handle finder thread it's time to leave this world.
 		self.noMoreHandle.set()
+		# 18.12: if Studio exits before the app module is ready, write whatever startup profile was gathered.
+		spldebugging.endStartupProfile()
 		# Manually clear the following dictionaries.
+		self._stopCartBankWatcher()
+		self._stopStatusBarCoalescing()
 		self.carts.clear()
 		self._cachedStatusObjs.clear()
+		self._statusObjsWindow = None
 		# Don't forget to reset timestamps for cart files.
-		splmisc._cartEditTimestamps = [0, 0, 0, 0]
+		# 18.12: parsed cart banks are kept instead.
+		splmisc._cartBanks.clear()
 		# Just to make sure:
 		if splbase._SPLWin: splbase._SPLWin = None
 		# 17.10: remove add-on specific command-line switches.
@@ -1300,7 +1390,7 @@ class AppModule(appModuleHandler.AppModule):
 
 	# Find a specific track based on a searched text.
 	# But first, check if track finder can be invoked.
-	# Attempt level specifies which track finder to open (0 = Track Finder, 1 = Column Search, 2 = Time range).
+	# Attempt level specifies which track finder to open (0 = Track Finder, 1 = Column Search, 2 = Time range, 3 = track comments search).
 	def _trackFinderCheck(self, attemptLevel):
 		if not splbase.studioIsRunning(): return False
 		playlistErrors = self.canPerformPlaylistCommands(announceErrors=False)
@@ -1314,6 +1404,9 @@ class AppModule(appModuleHandler.AppModule):
 			elif attemptLevel == 2:
 				# Translators: Presented when a user attempts to find tracks but is not at the track list.
 				ui.message(_("Time range finder is available only in track list."))
+			elif attemptLevel == 3:
+				# Translators: Presented when a user attempts to search track comments but is not at the track list.
+				ui.message(_("Track comments search is available only in track list."))
 			return False
 		# 17.06/15.8-LTS: use Studio API to find out if a playlist is even loaded, otherwise Track Finder will fail to notice a playlist.
 		# #81 (18.12): all taken care of by playlist checker method.
@@ -1392,38 +1485,93 @@ class AppModule(appModuleHandler.AppModule):
 	# Translators: Input help mode message for a command in Station Playlist Studio.
 	script_timeRangeFinder.__doc__=_("Locates track with duration within a time range")
 
+	# 18.12: track comments search.
+	# Comments containing the searched text are looked up in track comments store, then playlist tracks are checked against them in one pass.
+
+	def script_searchTrackComments(self, gesture):
+		if not self._trackFinderCheck(3): return
+		obj = api.getFocusObject()
+		if obj.role == controlTypes.ROLE_LIST:
+			obj = obj.firstChild
+		firstTrack = obj.parent.firstChild
+		# Translators: The label of the field to enter text to search for in track comments.
+		dlg = wx.TextEntryDialog(gui.mainFrame, _("Enter text to search for in track comments"),
+		# Translators: The title of the track comments search dialog.
+		_("Search track comments"))
+		def callback(result):
+			if result == wx.ID_OK and dlg.GetValue():
+				wx.CallAfter(self.trackCommentsSearchResults, dlg.GetValue(), firstTrack)
+		gui.runScriptModalDialog(dlg, callback)
+	# Translators: Input help mode message for a command in Station Playlist Studio.
+	script_searchTrackComments.__doc__=_("Lists tracks in the playlist whose comments contain the searched text")
+
+	def trackCommentsSearchResults(self, text, obj):
+		comments = splconfig.trackComments.search(text)
+		results = []
+		if comments:
+			filenameColumn = obj.indexOf("Filename")
+			titleColumn = obj.indexOf("Title")
+			position = 1
+			while obj is not None:
+				filename = obj._getColumnContentRaw(filenameColumn)
+				if filename:
+					comment = comments.get(splcomments.normalizeFilename(filename))
+					if comment is not None:
+						title = obj._getColumnContentRaw(titleColumn) or filename
+						# Translators: An entry in track comments search results (example: 5. Title: comment).
+						results.append(_("{position}. {title}: {comment}").format(position = position, title = title, comment = comment))
+				position += 1
+				obj = obj.next
+		if not results:
+			# Translators: Presented when no playlist tracks have comments containing the searched text.
+			ui.message(_("No track comments containing {text} were found in the playlist").format(text = text))
+			return
+		# Translators: Title of the track comments search results window.
+		ui.browseableMessage("\n".join(results), title=_("Track comments containing {text}").format(text = text))
+
 	# Cart explorer
 	cartExplorer = False
 	carts = {} # The carts dictionary (key = cart gesture, item = cart name).
+	# 18.12: cart bank watcher, active while cart explorer is on.
+	_cartBankWatcher = None
 
 	# Assigning carts.
-
-	def buildFNCarts(self):
-		# Used xrange, as it is much faster; change this to range if NvDA core decides to use Python 3.
-		# 18.02: use rangeGen that'll be assigned to range or xrange depending on Python version for now.
-		for i in rangeGen(12):
-			self.bindGesture("kb:f%s"%(i+1), "cartExplorer")
-			self.bindGesture("kb:shift+f%s"%(i+1), "cartExplorer")
-			self.bindGesture("kb:control+f%s"%(i+1), "cartExplorer")
-			self.bindGesture("kb:alt+f%s"%(i+1), "cartExplorer")
-
-	def buildNumberCarts(self):
-		# It is much faster to work directly with number row keys.
-		for i in "1234567890-=":
-			self.bindGesture("kb:%s"%(i), "cartExplorer")
-			self.bindGesture("kb:shift+%s"%(i), "cartExplorer")
-			self.bindGesture("kb:control+%s"%(i), "cartExplorer")
-			self.bindGesture("kb:alt+%s"%(i), "cartExplorer")
+	# 18.12: all cart explorer gestures are bound in one go from the below table, and cart keys for each gesture are looked up when cart explorer is entered.
+	_cartGestures = {}
+	_cartKeyGestures = {}
+
+	def buildCartGestures(self):
+		import inputCore
+		cartGestures = {}
+		# Cart keys and NVDA gesture names for them, used when playing carts found by name.
+		cartKeyGestures = {}
+		# Gesture modifier and the modifier used by cart banks.
+		for modifier, bankModifier in (("", ""), ("shift", "shift"), ("control", "ctrl"), ("alt", "alt")):
+			for key in ["f%s"%(i) for i in rangeGen(1, 13)] + list("1234567890-="):
+				gestureName = "+".join([modifier, key]) if modifier else key
+				cart = "+".join([bankModifier, key]) if bankModifier else key
+				# Number row carts are not available in Studio Standard.
+				cartGestures[inputCore.normalizeGestureIdentifier("kb:%s"%gestureName)] = (cart, not key.startswith("f"))
+				cartKeyGestures[cart] = gestureName
+		self._cartGestures = cartGestures
+		self._cartKeyGestures = cartKeyGestures
+		self._cartExplorerGestures = dict((identifier, "cartExplorer") for identifier in cartGestures)
+		self._cartExplorerGestures["kb:alt+nvda+shift+3"] = "findCart"
 
 	def cartsBuilder(self, build=True):
 		# A function to build and return cart commands.
 		if build:
-			self.buildFNCarts()
-			self.buildNumberCarts()
+			self.bindGestures(self._cartExplorerGestures)
 		else:
 			self.clearGestureBindings()
 			self.bindGestures(self.__gestures)
 
+	# 18.12: cart name index, rebuilt whenever carts change.
+	_cartNameIndex = None
+
+	def cartsChanged(self):
+		self._cartNameIndex = splmisc.CartNameIndex(self.carts, gestureNames=self._cartKeyGestures)
+
 	def script_toggleCartExplorer(self, gesture):
 		if not splbase.studioIsRunning(): return
 		if not self.cartExplorer:
@@ -1441,33 +1589,61 @@ class AppModule(appModuleHandler.AppModule):
 				return
 			else:
 				self.cartExplorer = True
+				self.buildCartGestures()
+				self.cartsChanged()
 				self.cartsBuilder()
+				self._cartBankWatcher = splmisc.CartBankWatcher(fg.name, self.carts, onRefresh=self.cartsChanged)
+				self._cartBankWatcher.start()
 				# Translators: Presented when cart explorer is on.
 				ui.message(_("Entering cart explorer"))
 		else:
 			self.cartExplorer = False
+			self._stopCartBankWatcher()
 			self.cartsBuilder(build=False)
 			self.carts.clear()
-			splmisc._cartEditTimestamps = None
+			self._cartNameIndex = None
+			splmisc._cartBanks.clear()
 			# Translators: Presented when cart explorer is off.
 			ui.message(_("Exiting cart explorer"))
 	# Translators: Input help mode message for a command in Station Playlist Studio.
 	script_toggleCartExplorer.__doc__=_("Toggles cart explorer to learn cart assignments.")
 
+	def _stopCartBankWatcher(self):
+		if self._cartBankWatcher is not None:
+			self._cartBankWatcher.stop()
+			self._cartBankWatcher = None
+
 	def script_cartExplorer(self, gesture):
 		if api.getForegroundObject().windowClassName != "TStudioForm":
 			gesture.send()
 			return
 		if scriptHandler.getLastScriptRepeatCount() >= 1: gesture.send()
 		else:
-			if gesture.displayName in self.carts: ui.message(self.carts[gesture.displayName])
-			elif self.carts["standardLicense"] and (len(gesture.displayName) == 1 or gesture.displayName[-2] == "+"):
+			cart, numberRow = next((self._cartGestures[identifier] for identifier in gesture.normalizedIdentifiers if identifier in self._cartGestures), (None, False))
+			if cart in self.carts: ui.message(self.carts[cart])
+			elif self.carts["standardLicense"] and numberRow:
 				# Translators: Presented when cart command is unavailable.
 				ui.message(_("Cart command unavailable"))
 			else:
 				# Translators: Presented when there is no cart assigned to a cart command.
 				ui.message(_("Cart unassigned"))
 
+	def script_findCart(self, gesture):
+		if not self.cartExplorer or api.getForegroundObject().windowClassName != "TStudioForm":
+			gesture.send()
+			return
+		try:
+			d = splmisc.SPLCartFinderDialog(gui.mainFrame, self._cartNameIndex)
+			gui.mainFrame.prePopup()
+			d.Raise()
+			d.Show()
+			gui.mainFrame.postPopup()
+			splmisc._findDialogOpened = True
+		except RuntimeError:
+			wx.CallAfter(splmisc._finderError)
+	# Translators: Input help mode message for a command in Station Playlist Studio.
+	script_findCart.__doc__=_("Finds carts by name while cart explorer is active")
+
 	# Library scan announcement
 	# Announces progress of a library scan (launched from insert tracks dialog by pressing Control+Shift+R or from rescan option from Options dialog).
 
@@ -1495,9 +1671,14 @@ class AppModule(appModuleHandler.AppModule):
 			if self.productVersion not in noLibScanMonitor: self.libraryScanning = True
 
 	# Report library scan (number of items scanned) in the background.
+	# 18.12: progress is reported by Studio heartbeat instead of a dedicated thread.
+	_libraryScanReporting = False
+	_libraryScanTicks = 0
+	# 18.12: library scan telemetry entry for the scan that has just finished.
+	_completedLibraryScan = None
+
 	def monitorLibraryScan(self):
-		global libScanT
-		if libScanT and libScanT.isAlive() and api.getForegroundObject().windowClassName == "TTrackInsertForm":
+		if self._libraryScanReporting and api.getForegroundObject().windowClassName == "TTrackInsertForm":
 			return
 		if splbase.studioAPI(1, 32) < 0:
 			self.libraryScanning = False
@@ -1512,27 +1693,22 @@ class AppModule(appModuleHandler.AppModule):
 			# Translators: Presented when library scanning is finished.
 			ui.message(_("{itemCount} items in the library").format(itemCount = splbase.studioAPI(0, 32)))
 		else:
-			libScanT = threading.Thread(target=self.libraryScanReporter)
-			libScanT.daemon = True
-			libScanT.start()
+			self._libraryScanReporting = True
+			self._libraryScanTicks = 0
 
-	def libraryScanReporter(self):
-		scanIter = 0
+	# Called by Studio heartbeat with the current scan count while library scan is being reported.
+	def libraryScanReporter(self, scanCount):
 		# 17.04: Use the constant directly, as 5.10 and later provides a convenient method to detect completion of library scans.
-		scanCount = splbase.studioAPI(1, 32)
-		while scanCount >= 0:
-			if not self.libraryScanning or not user32.FindWindowW(u"SPLStudio", None): return
-			time.sleep(1)
+		if scanCount >= 0:
 			# Do not continue if we're back on insert tracks form or library scan is finished.
 			if api.getForegroundObject().windowClassName == "TTrackInsertForm" or not self.libraryScanning:
+				self._libraryScanReporting = False
 				return
-			# Scan count may have changed during sleep.
-			scanCount = splbase.studioAPI(1, 32)
-			if scanCount < 0:
-				break
-			scanIter+=1
-			if scanIter%5 == 0 and splconfig.SPLConfig["General"]["LibraryScanAnnounce"] not in ("off", "ending"):
+			self._libraryScanTicks += 1
+			if self._libraryScanTicks%5 == 0 and splconfig.SPLConfig["General"]["LibraryScanAnnounce"] not in ("off", "ending"):
 				self._libraryScanAnnouncer(scanCount, splconfig.SPLConfig["General"]["LibraryScanAnnounce"])
+			return
+		self._libraryScanReporting = False
 		self.libraryScanning = False
 		# 18.04: what if config database died?
 		if splconfig.SPLConfig and splconfig.SPLConfig["General"]["LibraryScanAnnounce"] != "off":
@@ -1540,7 +1716,12 @@ class AppModule(appModuleHandler.AppModule):
 				tones.beep(370, 100)
 			else:
 				# Translators: Presented after library scan is done.
-				ui.message(_("Scan complete with {itemCount} items").format(itemCount = splbase.studioAPI(0, 32)))
+				message = _("Scan complete with {itemCount} items").format(itemCount = splbase.studioAPI(0, 32))
+				if self._completedLibraryScan is not None:
+					# Translators: Presented after library scan is done, following number of items in the library (example: in 02:30).
+					message = " ".join([message, _("in {duration}").format(duration = self._ms2time(int(self._completedLibraryScan["duration"]), ms=False, includeHours=True))])
+				ui.message(message)
+		self._completedLibraryScan = None
 
 	# Take care of library scanning announcement.
 	def _libraryScanAnnouncer(self, count, announcementType):
@@ -1552,7 +1733,19 @@ class AppModule(appModuleHandler.AppModule):
 				tones.beep(550, 100)
 				# No need to provide translatable string - just use index.
 				ui.message("{0}".format(count))
-			else: ui.message(_("{itemCount} items scanned").format(itemCount = count))
+			else: ui.message(_("{itemCount} items scanned").format(itemCount = count) + self._libraryScanEstimate())
+
+	# 18.12: scan rate and estimated time to completion (if known) from library scan telemetry, to be appended to library scan progress.
+	def _libraryScanEstimate(self):
+		telemetry = self.libraryScanTelemetry
+		if not telemetry.scanning or not telemetry.rate: return ""
+		# Translators: Presented as part of library scan progress (example: 120 items per second).
+		estimate = _(", {rate} items per second").format(rate = int(round(telemetry.rate)))
+		eta = telemetry.eta()
+		if eta is not None:
+			# Translators: Presented as part of library scan progress (example: about 01:30 remaining).
+			estimate += _(", about {eta} remaining").format(eta = self._ms2time(int(eta), ms=False, includeHours=True))
+		return estimate
 
 	# Place markers.
 	placeMarker = None
@@ -1852,7 +2045,7 @@ class AppModule(appModuleHandler.AppModule):
 	def script_escape(self, gesture):
 		gesture.send()
 		if self.libraryScanning:
-			if not libScanT or (libScanT and not libScanT.isAlive()):
+			if not self._libraryScanReporting:
 				self.monitorLibraryScan()
 
 	# The developer would like to get feedback from you.
@@ -1880,8 +2073,7 @@ class AppModule(appModuleHandler.AppModule):
 		self.clearGestureBindings()
 		self.bindGestures(self.__gestures)
 		if self.cartExplorer:
-			self.buildFNCarts()
-			self.buildNumberCarts()
+			self.cartsBuilder()
 
 	def script_error(self, gesture):
 		tones.beep(120, 100)
@@ -1959,22 +2151,51 @@ class AppModule(appModuleHandler.AppModule):
 	}
 
 	_cachedStatusObjs = {}
+	# 18.12: Studio window handle cached status objects came from.
+	# Status objects are looked up again if Studio window is recreated.
+	_statusObjsWindow = None
+
+	# Returns True if cached status objects came from the given Studio window, otherwise cached objects are thrown away.
+	def _validateStatusObjs(self, hwnd):
+		if hwnd == self._statusObjsWindow: return True
+		self._cachedStatusObjs.clear()
+		self._statusObjsWindow = hwnd
+		return False
+
+	def _studioWindowObj(self, hwnd):
+		fg = api.getForegroundObject()
+		if fg is not None and fg.windowClassName == "TStudioForm" and fg.windowHandle == hwnd: return fg
+		# 6.1: Allow gesture-based functions to look up status information even if Studio window isn't focused.
+		# 17.08: several SPL Controller commands will use this route.
+		return getNVDAObjectFromEvent(hwnd, OBJID_CLIENT, 0) if hwnd else None
+
+	# 18.12: look up all status objects in one pass through Studio window's children.
+	def prefetchStatusObjs(self, studioWindow=None):
+		hwnd = user32.FindWindowW(u"TStudioForm", None)
+		if self._validateStatusObjs(hwnd) and len(self._cachedStatusObjs) == len(self.statusObjs): return
+		if studioWindow is None or studioWindow.windowHandle != hwnd: studioWindow = self._studioWindowObj(hwnd)
+		if studioWindow is None: return
+		children = studioWindow.children
+		if len(children) <= 1: return
+		for infoIndex, childIndex in self.statusObjs.items():
+			try:
+				self._cachedStatusObjs[infoIndex] = children[childIndex]
+			except IndexError:
+				pass
+		debugOutput("status objects prefetched: %s"%len(self._cachedStatusObjs))
 
 	# Called in the layer commands themselves.
 	# 16.11: in Studio 5.20, it is possible to obtain some of these via the API, hence the API method is used.
 	def status(self, infoIndex):
 		# Look up the cached objects first for faster response.
-		if not infoIndex in self._cachedStatusObjs:
-			fg = api.getForegroundObject()
-			if fg is not None and fg.windowClassName != "TStudioForm":
-				# 6.1: Allow gesture-based functions to look up status information even if Studio window isn't focused.
-				# 17.08: several SPL Controller commands will use this route.
-				fg = getNVDAObjectFromEvent(user32.FindWindowW(u"TStudioForm", None), OBJID_CLIENT, 0)
-			statusObj = self.statusObjs[infoIndex]
-			# 7.0: sometimes (especially when first loaded), OBJID_CLIENT fails, so resort to retrieving focused object instead.
-			if fg is not None and fg.childCount > 1:
-				self._cachedStatusObjs[infoIndex] = fg.getChild(statusObj)
-			else: return api.getFocusObject()
+		# 18.12: provided that Studio window is the one these objects came from.
+		hwnd = user32.FindWindowW(u"TStudioForm", None)
+		if self._validateStatusObjs(hwnd) and infoIndex in self._cachedStatusObjs:
+			return self._cachedStatusObjs[infoIndex]
+		studioWindow = self._studioWindowObj(hwnd)
+		# 7.0: sometimes (especially when first loaded), OBJID_CLIENT fails, so resort to retrieving focused object instead.
+		if studioWindow is None or studioWindow.childCount <= 1: return api.getFocusObject()
+		self._cachedStatusObjs[infoIndex] = studioWindow.getChild(self.statusObjs[infoIndex])
 		return self._cachedStatusObjs[infoIndex]
 
 	# Status flags for Studio 5.20 API.
@@ -2482,6 +2703,7 @@ class AppModule(appModuleHandler.AppModule):
 		"kb:control+nvda+f":"findTrack",
 		"kb:nvda+f3":"findTrackNext",
 		"kb:shift+nvda+f3":"findTrackPrevious",
+		"kb:alt+nvda+shift+c":"searchTrackComments",
 		"kb:alt+nvda+3":"toggleCartExplorer",
 		"kb:alt+nvda+r":"setLibraryScanProgress",
 		"kb:control+shift+r":"startScanFromInsertTracks",
@@ -4,6 +4,10 @@
 
 # Base services for Studio app module and support modules
 
+import sys
+py3 = sys.version.startswith("3")
+import os
+import tempfile
 import ui
 from winUser import sendMessage, user32
 from .spldebugging import debugOutput
@@ -43,3 +47,30 @@ def selectTrack(trackIndex):
 	studioAPI(-1, 121)
 	debugOutput("selecting track index %s"%trackIndex)
 	studioAPI(trackIndex, 121)
+
+# 18.12: write data (bytes) to a file without leaving a half-written file behind if something goes wrong.
+# Data is written to a temporary file in the same folder, which then replaces the file in one step.
+def atomicWrite(path, data):
+	fd, tempPath = tempfile.mkstemp(prefix=os.path.basename(path)+".", suffix=".tmp", dir=os.path.dirname(path))
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(data)
+			f.flush()
+			os.fsync(f.fileno())
+		replaceFile(tempPath, path)
+	except:
+		try:
+			os.remove(tempPath)
+		except OSError:
+			pass
+		raise
+
+def replaceFile(source, destination):
+	if py3:
+		os.replace(source, destination)
+		return
+	# Python 2's os.rename cannot replace an existing file on Windows.
+	import ctypes
+	# MOVEFILE_REPLACE_EXISTING | MOVEFILE_WRITE_THROUGH
+	if not ctypes.windll.kernel32.MoveFileExW(unicode(source), unicode(destination), 0x1 | 0x8):
+		raise ctypes.WinError()
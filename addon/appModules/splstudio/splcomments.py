@@ -0,0 +1,277 @@
+# SPL Studio track comments
+# An app module and global plugin package for NVDA
+# Copyright 2018 Joseph Lee and others, released under GPL.
+# Provides the track comments store, keyed by track file name.
+# Comments are kept in a SQLite database and looked up one track at a time, with each change written as it happens.
+# If SQLite is not available, comments are kept in a pickle file as was the case in add-on 18.11 and earlier.
+
+import sys
+py3 = sys.version.startswith("3")
+import os
+import ntpath
+import io
+import csv
+import json
+if py3:
+	import pickle
+else:
+	import cPickle as pickle
+try:
+	import sqlite3
+except ImportError:
+	sqlite3 = None
+from .spldebugging import debugOutput
+
+# Errors raised by track comments stores besides IOError and OSError, such as when the database is locked or damaged.
+storeErrors = (sqlite3.Error,) if sqlite3 is not None else ()
+
+# Track comments database and the pickle used in add-on 18.11 and earlier.
+commentsDatabase = "spltrackcomments.db"
+commentsPickle = "spltrackcomments.pickle"
+
+# Studio is a Windows program, so file names differing only in case or in path separators refer to the same track.
+def normalizeFilename(filename):
+	return ntpath.normcase(ntpath.normpath(filename))
+
+def _loadPickle(path):
+	try:
+		with open(path, "rb") as f:
+			return pickle.load(f)
+	except (IOError, EOFError):
+		return {}
+
+class TrackCommentsDatabase(object):
+	"""Track comments stored in a SQLite database, with a dictionary-like interface.
+	Comments are looked up by normalized file name (the primary key), and additions, changes and removals are committed right away.
+	"""
+
+	# Database user version once comments from the pickle were brought over (or there was nothing to bring over).
+	migratedVersion = 1
+
+	def __init__(self, path, legacyPath=None):
+		self.path = path
+		self._db = sqlite3.connect(path)
+		self._db.execute("create table if not exists comments (filename text primary key, comment text not null)")
+		self._db.commit()
+		if self._db.execute("pragma user_version").fetchone()[0] < self.migratedVersion:
+			self._migrate(legacyPath)
+
+	# Bring over comments from the pickle, trying again next time if the pickle cannot be read right now.
+	# Comments already in the database (such as those from an earlier attempt, or changed since) are kept.
+	def _migrate(self, legacyPath):
+		if legacyPath is not None and os.path.isfile(legacyPath):
+			try:
+				with open(legacyPath, "rb") as f:
+					comments = pickle.load(f)
+			except (IOError, OSError):
+				debugOutput("cannot read track comments pickle, will try again later")
+				return
+			except Exception:
+				# Nothing can be recovered from a damaged pickle.
+				debugOutput("track comments pickle is damaged, not moving track comments")
+				comments = {}
+			debugOutput("moving %s track comments to comments database"%len(comments))
+			with self._db:
+				self._db.executemany("insert or ignore into comments values (?, ?)", ((normalizeFilename(filename), comment) for filename, comment in comments.items()))
+		# Recorded only after comments were committed, so an interrupted move is redone.
+		self._db.execute("pragma user_version = %s"%self.migratedVersion)
+		self._db.commit()
+
+	def __contains__(self, filename):
+		return self._db.execute("select 1 from comments where filename = ?", (normalizeFilename(filename),)).fetchone() is not None
+
+	def get(self, filename, default=None):
+		row = self._db.execute("select comment from comments where filename = ?", (normalizeFilename(filename),)).fetchone()
+		return row[0] if row is not None else default
+
+	def __getitem__(self, filename):
+		comment = self.get(filename)
+		if comment is None: raise KeyError(filename)
+		return comment
+
+	def __setitem__(self, filename, comment):
+		with self._db:
+			self._db.execute("insert or replace into comments values (?, ?)", (normalizeFilename(filename), comment))
+
+	def __delitem__(self, filename):
+		with self._db:
+			if not self._db.execute("delete from comments where filename = ?", (normalizeFilename(filename),)).rowcount:
+				raise KeyError(filename)
+
+	def __len__(self):
+		return self._db.execute("select count(*) from comments").fetchone()[0]
+
+	def clear(self):
+		with self._db:
+			self._db.execute("delete from comments")
+
+	# Iterate through (normalized file name, comment) pairs without loading all comments at once.
+	def items(self):
+		return iter(self._db.execute("select filename, comment from comments order by filename"))
+
+	# Merge comments from (file name, comment) pairs in one transaction, with empty comments removing existing ones.
+	# Returns the number of pairs merged.
+	def merge(self, comments):
+		count = 0
+		with self._db:
+			for filename, comment in comments:
+				if comment: self._db.execute("insert or replace into comments values (?, ?)", (normalizeFilename(filename), comment))
+				else: self._db.execute("delete from comments where filename = ?", (normalizeFilename(filename),))
+				count += 1
+		return count
+
+	# Return a dictionary of normalized file names and comments containing the given text (ignoring case).
+	def search(self, text):
+		pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+		return dict(self._db.execute("select filename, comment from comments where comment like ? escape '\\'", (pattern,)))
+
+	def close(self):
+		self._db.close()
+
+class TrackCommentsPickle(object):
+	"""Track comments kept in memory and saved to a pickle file, used if SQLite is not available.
+	Comments are keyed by normalized file name, and the pickle is written only if comments have changed.
+	"""
+
+	def __init__(self, path, legacyPath=None):
+		self.path = path
+		self._comments = dict((normalizeFilename(filename), comment) for filename, comment in _loadPickle(path).items())
+		self._changed = False
+
+	def __contains__(self, filename):
+		return normalizeFilename(filename) in self._comments
+
+	def get(self, filename, default=None):
+		return self._comments.get(normalizeFilename(filename), default)
+
+	def __getitem__(self, filename):
+		return self._comments[normalizeFilename(filename)]
+
+	def __setitem__(self, filename, comment):
+		self._comments[normalizeFilename(filename)] = comment
+		self._changed = True
+
+	def __delitem__(self, filename):
+		del self._comments[normalizeFilename(filename)]
+		self._changed = True
+
+	def __len__(self):
+		return len(self._comments)
+
+	def clear(self):
+		self._comments.clear()
+		self._changed = True
+
+	def items(self):
+		return iter(sorted(self._comments.items()))
+
+	def merge(self, comments):
+		# Pairs are merged into a copy so a failed import leaves comments alone.
+		merged = dict(self._comments)
+		count = 0
+		for filename, comment in comments:
+			if comment: merged[normalizeFilename(filename)] = comment
+			else: merged.pop(normalizeFilename(filename), None)
+			count += 1
+		self._comments = merged
+		self._changed = True
+		return count
+
+	def search(self, text):
+		text = text.lower()
+		return dict((filename, comment) for filename, comment in self._comments.items() if text in comment.lower())
+
+	def close(self):
+		if not self._changed: return
+		with open(self.path, "wb") as f:
+			pickle.dump(self._comments, f)
+		self._changed = False
+
+# Open track comments store in the given folder.
+def openComments(folder):
+	if sqlite3 is not None:
+		try:
+			return TrackCommentsDatabase(os.path.join(folder, commentsDatabase), legacyPath=os.path.join(folder, commentsPickle))
+		except sqlite3.Error:
+			debugOutput("cannot open track comments database, using track comments pickle")
+	return TrackCommentsPickle(os.path.join(folder, commentsPickle))
+
+# Bulk import and export.
+# Comments are exchanged as CSV (file name and comment columns, with an optional header row) or JSON Lines (an object with filename and comment keys per line) depending on file extension.
+# Files are read and written one comment at a time so large comment collections need not be held in memory.
+
+# Header row for CSV files, which spreadsheets tend to keep when saving them.
+csvHeader = ["filename", "comment"]
+
+class TrackCommentsFormatError(ValueError):
+	"""Raised when a track comments file cannot be understood.
+	"""
+
+def _isCSV(path):
+	return os.path.splitext(path)[1].lower() == ".csv"
+
+def _readCSV(path):
+	if py3:
+		with open(path, "r", newline="", encoding="utf-8-sig") as f:
+			for row in csv.reader(f):
+				yield row
+	else:
+		# Python 2's CSV module works with bytes.
+		with open(path, "rb") as f:
+			for row in csv.reader(f):
+				yield [field.decode("utf-8-sig") for field in row]
+
+textType = str if py3 else basestring
+
+def _readJSONLines(path):
+	with io.open(path, "r", encoding="utf-8-sig") as f:
+		for lineNumber, line in enumerate(f, 1):
+			if not line.strip(): continue
+			try:
+				record = json.loads(line)
+				filename, comment = record["filename"], record.get("comment", "")
+			except (ValueError, KeyError, TypeError, AttributeError):
+				raise TrackCommentsFormatError("Line %s is not a track comment record"%lineNumber)
+			# File names and comments must be text, with comment being optional.
+			if not isinstance(filename, textType) or not filename or not isinstance(comment, textType):
+				raise TrackCommentsFormatError("Line %s is not a track comment record"%lineNumber)
+			yield [filename, comment]
+
+# Yields (file name, comment) pairs from a track comments file.
+def readComments(path):
+	csvFile = _isCSV(path)
+	rows = _readCSV(path) if csvFile else _readJSONLines(path)
+	firstRow = True
+	for row in rows:
+		if not row: continue
+		if firstRow:
+			firstRow = False
+			if csvFile and [field.strip().lower() for field in row] == csvHeader: continue
+		if len(row) != 2 or not row[0]:
+			raise TrackCommentsFormatError("Invalid track comment record: %r"%(row,))
+		yield row[0], row[1]
+
+# Returns the number of comments imported.
+def importComments(store, path):
+	return store.merge(readComments(path))
+
+# Returns the number of comments exported.
+def exportComments(store, path):
+	count = 0
+	if _isCSV(path):
+		f = open(path, "w", newline="", encoding="utf-8") if py3 else open(path, "wb")
+		with f:
+			writer = csv.writer(f)
+			writer.writerow(csvHeader)
+			for filename, comment in store.items():
+				writer.writerow([filename, comment] if py3 else [filename.encode("utf-8"), comment.encode("utf-8")])
+				count += 1
+	else:
+		with io.open(path, "w", encoding="utf-8") as f:
+			for filename, comment in store.items():
+				line = json.dumps({"filename": filename, "comment": comment}, ensure_ascii=False)
+				# Python 2's JSON module returns bytes if there are no non-ASCII characters.
+				if not py3 and not isinstance(line, unicode): line = line.decode("utf-8")
+				f.write(line + u"\n")
+				count += 1
+	return count
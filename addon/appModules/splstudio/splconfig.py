@@ -20,8 +20,8 @@ try:
 	from configobj.validate import Validator
 except ImportError:
 	from validate import Validator
-import time
 import datetime
+import json
 import config
 import globalVars
 import ui
@@ -37,6 +37,10 @@ except RuntimeError:
 	splupdate = None
 from . import splactions
 from . import spldebugging
+from . import spltriggers
+from . import spltimers
+from . import splcomments
+from .splbase import atomicWrite, replaceFile
 
 # Python 3 preparation (a compatibility layer until Six module is included).
 rangeGen = range if py3 else xrange
@@ -109,6 +113,8 @@ SPLConPassthrough = boolean(default=false)
 CompatibilityLayer = option("off", "jfw", "wineyes", default="off")
 ProfileTriggerThreshold = integer(min=5, max=60, default=15)
 PilotFeatures = boolean(default=false)
+StatusBarCoalescing = integer(min=0, max=1000, default=250)
+ListenerSampleInterval = integer(min=0, max=600, default=60)
 [Update]
 AutoUpdateCheck = boolean(default=true)
 UpdateInterval = integer(min=0, max=180, default=30)
@@ -216,6 +222,8 @@ class ConfigHub(ChainMap):
 		config.post_configSave.register(self.handlePostConfigSave)
 		# 18.09: pilot features.
 		self._pendingPilotFeaturesToggle = False
+		# 18.12: compile column announcement settings for the active profile so track items don't have to.
+		self.compileColumnAnnouncementPlan()
 
 	# Various properties
 	@property
@@ -523,6 +531,7 @@ class ConfigHub(ChainMap):
 		self.resetHappened = True
 		# 18.08: don't forget to change type for Playlist Transcripts/included columns set.
 		self["PlaylistTranscripts"]["IncludedColumns"] = set(_SPLDefaults["PlaylistTranscripts"]["IncludedColumns"])
+		self.compileColumnAnnouncementPlan()
 
 	def profileIndexByName(self, name):
 		# 8.0 optimization: Only traverse the profiles list if head (active profile) or tail does not yield profile name in question.
@@ -611,8 +620,26 @@ class ConfigHub(ChainMap):
 	def swapProfiles(self, prevProfile, newProfile, showSwitchIndex=False):
 		former, current = self.profileIndexByName(prevProfile if prevProfile is not None else self.switchHistory[-1]), self.profileIndexByName(newProfile)
 		self.profiles[current], self.profiles[former] = self.profiles[former], self.profiles[current]
+		self.compileColumnAnnouncementPlan()
 		if showSwitchIndex: return current
 
+	# 18.12: column announcement plan for the active profile.
+	# This is a tuple of include column headers flag and a list of (column index, header) pairs in announcement order, or None if screen order should be used.
+	# Column index is the position of the column in Studio 5.10 and later.
+	# Must be compiled again whenever the active profile or its column announcement settings change.
+	def compileColumnAnnouncementPlan(self):
+		columnAnnouncement = self.profiles[0]["ColumnAnnouncement"]
+		columnOrder = columnAnnouncement["ColumnOrder"]
+		includedColumns = columnAnnouncement["IncludedColumns"]
+		# 6.3: Catch an unusual case where screen order is off yet column order is same as screen order and NvDA is told to announce all columns.
+		if (columnAnnouncement["UseScreenColumnOrder"]
+		or (columnOrder == _SPLDefaults["ColumnAnnouncement"]["ColumnOrder"] and len(includedColumns) == 17)):
+			self.columnAnnouncementPlan = None
+			return
+		columnPositions = _SPLDefaults["ColumnAnnouncement"]["ColumnOrder"]
+		self.columnAnnouncementPlan = (columnAnnouncement["IncludeColumnHeaders"],
+		[(columnPositions.index(header)+1, header) for header in columnOrder if header in includedColumns])
+
 	# 18.09: determine if pilot features can be used.
 	@property
 	def canEnablePilotFeatures(self):
@@ -672,7 +699,8 @@ def initialize():
 	# This opens up many possibilities, including config caching, loading specific sections only and others (the latter saves memory).
 	# 8.0: Replaced by ConfigHub object.
 	# #64 (18.07): perfomed by openConfig function.
-	openConfig("splstudio")
+	with spldebugging.startupPhase("config"):
+		openConfig("splstudio")
 	# Locate instant profile and do something otherwise.
 	if SPLConfig.instantSwitch is not None and SPLConfig.instantSwitch not in SPLConfig.profileNames:
 		spldebugging.debugOutput("Failed to locate instant switch profile")
@@ -680,11 +708,9 @@ def initialize():
 		SPLConfig.instantSwitch = None
 	# LTS: Load track comments if they exist.
 	# This must be a separate file (another pickle file).
-	# 8.0: Do this much later when a track is first focused.
-	try:
-		trackComments = pickle.load(file(os.path.join(globalVars.appArgs.configPath, "spltrackcomments.pickle"), "r"))
-	except (IOError, EOFError):
-		pass
+	# 18.12: open track comments store, with comments looked up as tracks are focused.
+	with spldebugging.startupPhase("track comments"):
+		trackComments = splcomments.openComments(globalVars.appArgs.configPath)
 	if len(_configLoadStatus):
 		# Translators: Standard error title for configuration error.
 		title = _("Studio add-on Configuration error")
@@ -704,7 +730,9 @@ def initialize():
 		runConfigErrorDialog("\n".join(messages), title)
 	# Fire up profile triggers.
 	# 17.10: except when normal profile only flag is specified.
-	if not SPLConfig.normalProfileOnly: initProfileTriggers()
+	if not SPLConfig.normalProfileOnly:
+		with spldebugging.startupPhase("profile triggers"):
+			initProfileTriggers()
 	# 7.1: Make sure encoder settings map isn't corrupted.
 	try:
 		streamLabels = ConfigObj(os.path.join(globalVars.appArgs.configPath, "splStreamLabels.ini"))
@@ -714,6 +742,8 @@ def initialize():
 		runConfigErrorDialog(_("Your encoder settings had errors and were reset to defaults. If you have stream labels configured for various encoders, please add them again."),
 		# Translators: Title of the encoder settings error dialog.
 		_("Encoder settings error"))
+	# 18.12: let others know settings are ready (timed if startup profiler is active).
+	spldebugging.notifyAction(splactions.SPLActionSettingsLoaded, "SPLActionSettingsLoaded")
 
 # Cache a copy of the loaded config.
 # This comes in handy when saving configuration to disk. For the most part, no change occurs to config.
@@ -724,35 +754,117 @@ _SPLCache = {}
 # Each record (profile name) consists of seven fields organized as a list:
 # A bit vector specifying which days should this profile be active, the first five fields needed for constructing a datetime.datetime object used to look up when to trigger this profile, and an integer specifying the duration in minutes.
 profileTriggers = {} # Using a pickle is quite elegant.
-profileTriggers2 = {} # For caching purposes.
-# Profile triggers pickle.
+# Profile triggers pickle (18.12: only read when moving to the triggers store below).
 SPLTriggersFile = os.path.join(globalVars.appArgs.configPath, "spltriggers.pickle")
+# 18.12: profile triggers store.
+SPLTriggersStore = os.path.join(globalVars.appArgs.configPath, "spltriggers.jsonl")
+_triggerStore = None
 # Trigger timer.
 triggerTimer = None
+# 18.12: trigger scheduler (a heap of next trigger times) and how often to look at it again if the next trigger is far away (in seconds).
+# The latter allows system clock changes (such as daylight saving time) to be taken into account, as trigger timer is not tied to the system clock.
+_triggerScheduler = None
+_triggerRecheckInterval = 3600
+
+class TriggerStore(object):
+	"""Profile triggers store, a journal of trigger records following a version header, one JSON array per line.
+	Each record is either ["set", profile, bits, year, month, day, hour, minute, duration] or ["del", profile], with later records overriding earlier ones.
+	Saving triggers appends records for changed profiles only, and the journal is rewritten (compacted) in one step when outdated records outnumber current ones or when the file could not be read.
+	Invalid records are skipped, and a file that cannot be read is set aside so startup can go on.
+	"""
+
+	version = spltriggers.triggerJournalVersion
+
+	def __init__(self, path, legacyPath=None):
+		self.path = path
+		self.legacyPath = legacyPath
+		# Triggers as recorded in the store.
+		self._stored = {}
+		self._records = 0
+		self._compactionNeeded = False
+
+	def load(self):
+		self._stored = {}
+		self._records = 0
+		self._compactionNeeded = False
+		try:
+			with open(self.path, "rb") as f:
+				lines = f.read().splitlines()
+		except IOError:
+			# The journal (and its version header) must be written in full the next time triggers are saved.
+			self._compactionNeeded = True
+			self._loadLegacy()
+			return self._triggers()
+		try:
+			self._stored, self._records, invalid = spltriggers.readTriggerJournal(lines)
+		except ValueError:
+			spldebugging.debugOutput("triggers store is unreadable, setting it aside")
+			try:
+				replaceFile(self.path, self.path + ".bak")
+			except (IOError, OSError):
+				pass
+			self._compactionNeeded = True
+			return self._triggers()
+		if invalid:
+			spldebugging.debugOutput("%s invalid trigger records skipped"%invalid)
+			self._compactionNeeded = True
+		return self._triggers()
+
+	# Bring in triggers from the pickle used by add-on 18.11 and earlier.
+	def _loadLegacy(self):
+		if self.legacyPath is None or not os.path.isfile(self.legacyPath): return
+		try:
+			with open(self.legacyPath, "rb") as f:
+				triggers = pickle.load(f)
+			for profile, entry in triggers.items():
+				entry = spltriggers.validTriggerEntry(entry)
+				if entry is not None: self._stored[profile] = entry
+		except Exception:
+			spldebugging.debugOutput("cannot read profile triggers pickle")
+		self._compactionNeeded = True
+
+	def _triggers(self):
+		return dict((profile, list(entry)) for profile, entry in self._stored.items())
+
+	def _encode(self, record):
+		return (json.dumps(record) + "\n").encode("utf-8")
+
+	def save(self, triggers):
+		triggers = dict((profile, list(entry)) for profile, entry in triggers.items())
+		changes = [["set", profile] + entry for profile, entry in triggers.items() if self._stored.get(profile) != entry]
+		changes.extend(["del", profile] for profile in self._stored if profile not in triggers)
+		if not changes and not self._compactionNeeded: return
+		# Changes can be appended only if the journal, along with its version header, is there.
+		if self._records == 0 or not os.path.isfile(self.path): self._compactionNeeded = True
+		if self._compactionNeeded or self._records + len(changes) > 2 * len(triggers) + 16:
+			records = [["set", profile] + entry for profile, entry in sorted(triggers.items())]
+			atomicWrite(self.path, b"".join([self._encode({"version": self.version})] + [self._encode(record) for record in records]))
+			self._records = len(records)
+			self._compactionNeeded = False
+		else:
+			with open(self.path, "ab") as f:
+				f.write(b"".join(self._encode(record) for record in changes))
+			self._records += len(changes)
+		self._stored = triggers
 
 # Prepare the triggers dictionary and other runtime support.
 def initProfileTriggers():
 	# Make sure config hub is ready.
 	if SPLConfig is None:
 		raise RuntimeError("ConfigHub is unavailable, profile triggers manager cannot start")
-	global profileTriggers, profileTriggers2
-	try:
-		profileTriggers = pickle.load(file(SPLTriggersFile, "r"))
-	except IOError:
-		profileTriggers = {}
-	# Cache profile triggers, used to compare the runtime dictionary against the cache.
-	profileTriggers2 = dict(profileTriggers)
+	global profileTriggers, _triggerStore
+	# 18.12: load triggers from the triggers store.
+	_triggerStore = TriggerStore(SPLTriggersStore, legacyPath=SPLTriggersFile)
+	profileTriggers = _triggerStore.load()
 	# Is the triggers dictionary and the config pool in sync?
+	# 18.12: look up profile names in a set instead of going through profiles list for each trigger.
 	if len(profileTriggers):
 		spldebugging.debugOutput("trigger profiles found, verifying existence of profiles")
-		nonexistent = []
-		for profile in list(profileTriggers.keys()):
-			try:
-				SPLConfig.profileIndexByName(profile)
-			except ValueError:
-				spldebugging.debugOutput("profile %s does not exist"%profile)
-				nonexistent.append(profile)
-				del profileTriggers[profile]
+		profileNames = set(SPLConfig.profileNames)
+		nonexistent = [profile for profile in profileTriggers if profile not in profileNames]
+		for profile in nonexistent:
+			spldebugging.debugOutput("profile %s does not exist"%profile)
+			del profileTriggers[profile]
 		if len(nonexistent):
 			# Translators: Message presented indicating missing time-based profiles.
 			wx.CallAfter(gui.messageBox, _("Could not locate the following time-based profile(s):\n{profiles}").format(profiles = ", ".join(nonexistent)),
@@ -760,132 +872,105 @@ def initProfileTriggers():
 			_("Time-based profiles missing"), wx.OK|wx.ICON_ERROR)
 	triggerStart()
 
+# 18.12: record trigger changes right away (such as when add-on settings are closed).
+def commitProfileTriggers():
+	if _triggerStore is None or profileTriggers is None: return
+	try:
+		_triggerStore.save(profileTriggers)
+	except (IOError, OSError):
+		spldebugging.debugOutput("cannot save profile triggers")
+
 # Locate time-based profiles if any.
 # A 4-tuple will be returned, containing the next trigger time (for time delta calculation), the profile name for this trigger time, whether an immediate switch is necessary, and if so, the duration delta for profiles with duration entry specified.
+# 18.12: consults the trigger scheduler instead of going through all triggers.
 def nextTimedProfile(current=None):
-	if current is None: current = datetime.datetime.now()
+	if current is None: current = spltriggers.now()
 	# No need to proceed if no timed profiles are defined.
 	if not len(profileTriggers): return None
-	possibleTriggers = []
-	for profile in list(profileTriggers.keys()):
-		shouldBeSwitched = False
-		entry = list(profileTriggers[profile])
-		# Construct the comparison datetime (see the profile triggers spec).
-		triggerTime = datetime.datetime(entry[1], entry[2], entry[3], entry[4], entry[5])
-		# Hopefully the trigger should be ready before the show, but sometimes it isn't.
-		if current > triggerTime:
-			# #52 (18.03/15.14-LTS): check the duration field first.
-			durationDelta = (current-triggerTime).seconds
-			if durationDelta < (entry[6]*60):
-				# Return the tuple immediately, as the show is more important.
-				return (triggerTime, profile, True, (entry[6]*60) - durationDelta)
-			else: profileTriggers[profile] = setNextTimedProfile(profile, entry[0], datetime.time(entry[4], entry[5]), date=current, duration=entry[6])
-		possibleTriggers.append((triggerTime, profile, shouldBeSwitched, None))
-	return min(possibleTriggers) if len(possibleTriggers) else None
+	return _getTriggerScheduler().next(current)
 
 # Some helpers used in locating next air date/time.
+# 18.12: now part of triggers module.
+setNextTimedProfile = spltriggers.setNextTimedProfile
 
-# Set the next timed profile.
-# Bits indicate the trigger days vector, hhmm is time, with the optional date being a specific date otherwise current date.
-def setNextTimedProfile(profile, bits, switchTime, date=None, duration=0):
-	if date is None: date = datetime.datetime.now()
-	dayIndex = date.weekday()
-	triggerCandidate = 64 >> dayIndex
-	currentTime = datetime.time(date.hour, date.minute, date.second, date.microsecond)
-	# Case 1: Show hasn't begun.
-	if (bits & triggerCandidate) and currentTime < switchTime:
-		delta = 0
-	else:
-		# Case 2: This is a weekly show.
-		if bits == triggerCandidate:
-			delta = 7
-		else:
-			import math
-			# Scan the bit vector until finding the correct date and calculate the resulting delta (dayIndex modulo 7).
-			# Take away the current trigger bit as this is invoked once the show air date has passed.
-			days = bits-triggerCandidate if bits & triggerCandidate else bits
-			currentDay = int(math.log(triggerCandidate, 2))
-			nextDay = int(math.log(days, 2))
-			# Hoping the resulting vector will have some bits set to 1...
-			if triggerCandidate > days:
-				delta = currentDay-nextDay
-			else:
-				triggerBit = -1
-				for bit in rangeGen(currentDay-1, -1, -1):
-					if 2 ** bit & days:
-						triggerBit = bit
-						break
-				if triggerBit > -1:
-					delta = currentDay-triggerBit
-				else:
-					delta = 7-(nextDay-currentDay)
-	date += datetime.timedelta(delta)
-	return [bits, date.year, date.month, date.day, switchTime.hour, switchTime.minute, duration]
+# The scheduler must follow the triggers dictionary, which is replaced when add-on settings are saved.
+def _getTriggerScheduler():
+	global _triggerScheduler
+	if _triggerScheduler is None or _triggerScheduler.triggers is not profileTriggers:
+		_triggerScheduler = spltriggers.TriggerScheduler(profileTriggers)
+	return _triggerScheduler
 
 # Find if another profile is occupying the specified time slot.
+# 18.12: uses a weekly interval index, which also catches shows airing on some of the same days or past midnight.
+# To find all overlapping profiles, use the index directly.
+TriggerIntervalIndex = spltriggers.TriggerIntervalIndex
+
 def duplicateExists(map, profile, bits, hour, min, duration):
 	if len(map) == 0 or (len(map) == 1 and profile in map): return False
-	# Convert hours and minutes to an integer for faster comparison.
-	start1 = (hour*60) + min
-	end1 = start1+duration
-	# A possible duplicate may exist simply because of bits.
-	for item in [p for p in map.keys() if p != profile]:
-		if map[item][0] == bits:
-			entry = map[item]
-			start2 = (entry[4] * 60) + entry[5]
-			end2 = start2+entry[6]
-			if start1 <= start2 <= end1 or start2 <= start1 <= end2:
-				return True
-	return False
+	return len(TriggerIntervalIndex(map).conflicts(bits, hour, min, duration, exclude=profile)) > 0
 
 # Start the trigger timer based on above information.
 # Can be restarted if needed.
+# 18.12: only one non-blocking timer (from add-on timer wheel) is used, which either starts the countdown or looks at the scheduler again later.
 def triggerStart(restart=False):
 	global SPLConfig, triggerTimer
 	# Restart the timer when called from triggers dialog in order to prevent multiple timers from running.
-	if triggerTimer is not None and triggerTimer.IsRunning() and restart:
+	# 18.12: also when re-arming after a profile switch.
+	if triggerTimer is not None and triggerTimer.IsRunning():
 		triggerTimer.Stop()
-		triggerTimer = None
+	triggerTimer = None
 	queuedProfile = nextTimedProfile()
 	if queuedProfile is not None:
 		try:
 			SPLTriggerProfile = queuedProfile[1]
 		except ValueError:
 			SPLTriggerProfile = None
-		# 17.08: The config hub object will now keep an eye on this.
-		SPLConfig.timedSwitch = SPLTriggerProfile
+		global _SPLTriggerEndTimer
 		# We are in the midst of a show, so switch now.
 		if queuedProfile[2]:
+			# 17.08: The config hub object will now keep an eye on this.
+			SPLConfig.timedSwitch = SPLTriggerProfile
 			# Only come here if this is the first time this function is run (startup).
 			if not restart: triggerProfileSwitch(durationDelta = queuedProfile[3])
 			else:
 				# restart the timer if required.
-				global _SPLTriggerEndTimer
 				if _SPLTriggerEndTimer is not None and _SPLTriggerEndTimer.IsRunning():
 					_SPLTriggerEndTimer.Stop()
-					_SPLTriggerEndTimer = wx.PyTimer(triggerProfileSwitch)
-					_SPLTriggerEndTimer.Start(queuedProfile[3] * 1000, True)
+					_SPLTriggerEndTimer = spltimers.callLater(queuedProfile[3], triggerProfileSwitch)
 				else: triggerProfileSwitch(durationDelta = queuedProfile[3])
+		# 18.12: the next show will be looked up once the current one ends.
+		elif _SPLTriggerEndTimer is not None and _SPLTriggerEndTimer.IsRunning():
+			return
 		else:
-			switchAfter = (queuedProfile[0] - datetime.datetime.now())
-			if switchAfter.days == 0 and switchAfter.seconds <= 3600:
-				time.sleep((switchAfter.microseconds+1000) / 1000000.0)
-				from .splmisc import SPLCountdownTimer
-				triggerTimer = SPLCountdownTimer(switchAfter.seconds, triggerProfileSwitch, SPLConfig["Advanced"]["ProfileTriggerThreshold"])
-				triggerTimer.Start()
+			SPLConfig.timedSwitch = SPLTriggerProfile
+			switchAfter = spltriggers.totalSeconds(queuedProfile[0] - spltriggers.now())
+			countdownAfter = switchAfter - SPLConfig["Advanced"]["ProfileTriggerThreshold"]
+			if countdownAfter > _triggerRecheckInterval:
+				triggerTimer = spltimers.callLater(_triggerRecheckInterval, triggerStart)
+			elif countdownAfter > 0:
+				triggerTimer = spltimers.callLater(countdownAfter, _triggerCountdown)
+			else: _triggerCountdown()
+
+# Announce countdown seconds before switching to the next time-based profile.
+def _triggerCountdown():
+	global triggerTimer
+	queuedProfile = _getTriggerScheduler().peek()
+	if queuedProfile is None: return
+	switchAfter = spltriggers.totalSeconds(queuedProfile[0] - spltriggers.now())
+	from .splmisc import SPLCountdownTimer
+	triggerTimer = SPLCountdownTimer(max(int(round(switchAfter)), 1), _triggerFired, SPLConfig["Advanced"]["ProfileTriggerThreshold"])
+	triggerTimer.Start()
 
 # Dump profile triggers pickle away.
+# 18.12: the triggers store records changed triggers only, which takes care of unnecessary disk writes.
 def saveProfileTriggers():
-	global triggerTimer, profileTriggers, profileTriggers2
+	global triggerTimer, profileTriggers, _triggerStore
 	if triggerTimer is not None and triggerTimer.IsRunning():
 		triggerTimer.Stop()
 		triggerTimer = None
-	# Unless it is a daily show, profile triggers would not have been modified.
-	# This trick is employed in order to reduce unnecessary disk writes.
-	if profileTriggers != profileTriggers2:
-		pickle.dump(profileTriggers, file(SPLTriggersFile, "wb"))
+	commitProfileTriggers()
 	profileTriggers = None
-	profileTriggers2 = None
+	_triggerStore = None
 
 # Copy settings across profiles.
 # Setting complete flag controls whether profile-specific settings are applied (true otherwise, only set when resetting profiles).
@@ -969,7 +1054,7 @@ def closeConfig(splComponent):
 
 # Terminate the config and related subsystems.
 def terminate():
-	global SPLConfig, _SPLCache, _SPLTriggerEndTimer, _triggerProfileActive
+	global SPLConfig, _SPLCache, _SPLTriggerEndTimer, _triggerProfileActive, trackComments
 	# #30 (17.05): If we come here before a time-based profile expires, the trigger end timer will meet a painful death.
 	if _SPLTriggerEndTimer is not None and _SPLTriggerEndTimer.IsRunning():
 		_SPLTriggerEndTimer.Stop()
@@ -979,8 +1064,10 @@ def terminate():
 	# Close profile triggers dictionary.
 	# 17.10: but if only the normal profile is in use, it won't do anything.
 	if not SPLConfig.normalProfileOnly: saveProfileTriggers()
-	# Dump track comments.
-	pickle.dump(trackComments, file(os.path.join(globalVars.appArgs.configPath, "spltrackcomments.pickle"), "wb"))
+	# Close track comments store.
+	# 18.12: changes are saved as they happen (or if comments were changed if SQLite is unavailable).
+	trackComments.close()
+	trackComments = {}
 	# Now save profiles.
 	# 8.0: Call the save method.
 	# #64 (18.07): separated into its own function in 2018.
@@ -1030,6 +1117,9 @@ def triggerProfileSwitch(durationDelta=None):
 		if SPLConfig.activeProfile == SPLTriggerProfile:
 			# Translators: Presented when trying to switch to an instant switch profile when one is already using the instant switch profile.
 			ui.message(_("A profile trigger is already active"))
+			# 18.12: don't lose track of the next show.
+			_getTriggerScheduler().advance(SPLTriggerProfile, spltriggers.now())
+			triggerStart()
 			return
 		SPLConfig.switchProfileStart(SPLConfig.activeProfile, SPLTriggerProfile, "timed")
 		# Set the global trigger flag to inform various subsystems such as add-on settings dialog.
@@ -1037,25 +1127,42 @@ def triggerProfileSwitch(durationDelta=None):
 		# Set the next trigger date and time.
 		triggerSettings = profileTriggers[SPLTriggerProfile]
 		# Set next trigger if no duration is specified.
+		# 18.12: and wait for the next show.
 		if triggerSettings[6] == 0:
-			profileTriggers[SPLTriggerProfile] = setNextTimedProfile(SPLTriggerProfile, triggerSettings[0], datetime.time(triggerSettings[4], triggerSettings[5]))
+			_getTriggerScheduler().advance(SPLTriggerProfile, spltriggers.now())
+			triggerStart()
 		else:
-			_SPLTriggerEndTimer = wx.PyTimer(triggerProfileSwitch)
-			_SPLTriggerEndTimer.Start(triggerSettings[6] * 60 * 1000 if durationDelta is None else durationDelta * 1000, True)
-	else:
-		SPLConfig.switchProfileEnd(None, SPLConfig.prevProfile, "timed")
-		_triggerProfileActive = False
-		# Stop the ending timer.
-		if _SPLTriggerEndTimer is not None and _SPLTriggerEndTimer.IsRunning():
-			_SPLTriggerEndTimer.Stop()
-			_SPLTriggerEndTimer = None
+			_SPLTriggerEndTimer = spltimers.callLater(triggerSettings[6] * 60 if durationDelta is None else durationDelta, triggerProfileSwitch)
+	else: _triggerProfileEnd()
+
+# End the active time-based profile and optionally wait for the next show.
+def _triggerProfileEnd(rearm=True):
+	global _SPLTriggerEndTimer, _triggerProfileActive
+	endedProfile = SPLConfig.activeProfile
+	SPLConfig.switchProfileEnd(None, SPLConfig.prevProfile, "timed")
+	_triggerProfileActive = False
+	# Stop the ending timer.
+	if _SPLTriggerEndTimer is not None and _SPLTriggerEndTimer.IsRunning():
+		_SPLTriggerEndTimer.Stop()
+	_SPLTriggerEndTimer = None
+	# 18.12: the show is over, so move on to the next one.
+	# Profiles without duration were moved along when the show began.
+	current = spltriggers.now()
+	if endedProfile in profileTriggers and spltriggers.triggerTime(profileTriggers[endedProfile]) <= current:
+		_getTriggerScheduler().advance(endedProfile, current)
+	if rearm: triggerStart()
+
+# Called when countdown for the next show is complete.
+def _triggerFired():
+	# 18.12: a time-based profile without duration may still be active, so return to the previous profile first.
+	if _triggerProfileActive: _triggerProfileEnd(rearm=False)
+	triggerProfileSwitch()
 
 # Let SPL track item know if it needs to build description pieces.
 # To be renamed and used in other places in 7.0.
+# 18.12: consults column announcement plan compiled by ConfigHub.
 def _shouldBuildDescriptionPieces():
-	return (not SPLConfig["ColumnAnnouncement"]["UseScreenColumnOrder"]
-	and (SPLConfig["ColumnAnnouncement"]["ColumnOrder"] != _SPLDefaults["ColumnAnnouncement"]["ColumnOrder"]
-	or len(SPLConfig["ColumnAnnouncement"]["IncludedColumns"]) != 17))
+	return SPLConfig.columnAnnouncementPlan is not None
 
 # Additional configuration and miscellaneous dialogs
 # See splconfui module for basic configuration dialogs.
@@ -1159,15 +1266,16 @@ def showStartupDialogs(oldVer=False, oldVerReturn=False):
 			#splupdate.SPLUpdateChannel = "lts"
 			#os.remove(os.path.join(globalVars.appArgs.configPath, "addons", "stationPlaylist", "ltsprep"))
 	#if oldVerReturn: return
-	if SPLConfig["Startup"]["WelcomeDialog"]:
-		gui.mainFrame.prePopup()
-		WelcomeDialog(gui.mainFrame).Show()
-		gui.mainFrame.postPopup()
-	import audioDucking
-	if SPLConfig["Startup"]["AudioDuckingReminder"] and audioDucking.isAudioDuckingSupported():
-		gui.mainFrame.prePopup()
-		AudioDuckingReminder(gui.mainFrame).Show()
-		gui.mainFrame.postPopup()
+	with spldebugging.startupPhase("startup dialogs"):
+		if SPLConfig["Startup"]["WelcomeDialog"]:
+			gui.mainFrame.prePopup()
+			WelcomeDialog(gui.mainFrame).Show()
+			gui.mainFrame.postPopup()
+		import audioDucking
+		if SPLConfig["Startup"]["AudioDuckingReminder"] and audioDucking.isAudioDuckingSupported():
+			gui.mainFrame.prePopup()
+			AudioDuckingReminder(gui.mainFrame).Show()
+			gui.mainFrame.postPopup()
 
 # Message verbosity pool.
 # To be moved to its own module in add-on 7.0.
@@ -20,8 +20,10 @@ import sys
 py3 = sys.version.startswith("3")
 import os
 import weakref
+import csv
 import api
 import wx
+from logHandler import log
 from winUser import user32
 import tones
 try:
@@ -32,6 +34,7 @@ import addonHandler
 addonHandler.initTranslation()
 from . import splconfig
 from . import splactions
+from . import splcomments
 
 # Python 3 preparation (a compatibility layer until Six module is included).
 rangeGen = range if py3 else xrange
@@ -143,6 +146,8 @@ class BroadcastProfilesPanel(gui.SettingsPanel):
 		except AttributeError:
 			pass
 		splconfig.triggerStart(restart=True)
+		# 18.12: changed triggers are recorded right away.
+		splconfig.commitProfileTriggers()
 		# 7.0: No matter what happens, merge appropriate profile.
 		try:
 			prevActive = self.activeProfile
@@ -398,6 +403,8 @@ class TriggersDialog(wx.Dialog):
 		super(TriggersDialog, self).__init__(parent, title=_("Profile triggers for {profileName}").format(profileName = profile))
 		self.profile = profile
 		self.selection = parent.profiles.GetSelection()
+		# 18.12: index trigger windows of all time-based profiles so overlapping time slots can be found quickly.
+		self._triggerIndex = splconfig.TriggerIntervalIndex(parent._profileTriggersConfig)
 		# When referencing profile triggers, use the dictionary stored in the main add-on settings.
 		# This is needed in order to discard changes when cancel button is clicked from the parent dialog.
 		# 7.0: Remove this text for now (may return in 7.1 if requested).
@@ -489,9 +496,11 @@ class TriggersDialog(wx.Dialog):
 			if bit:
 				hour, min = self.hourEntry.GetValue(), self.minEntry.GetValue()
 				duration = self.durationEntry.GetValue()
-				if splconfig.duplicateExists(parent._profileTriggersConfig, self.profile, bit, hour, min, duration):
-					# Translators: Presented if another profile occupies a time slot set by the user.
-					gui.messageBox(_("A profile trigger already exists for the entered time slot. Please choose a different date or time."),
+				# 18.12: list all profiles occupying the time slot, including those airing on some of the selected days or past midnight.
+				conflicts = self._triggerIndex.conflicts(bit, hour, min, duration, exclude=self.profile)
+				if conflicts:
+					# Translators: Presented if other profiles occupy a time slot set by the user.
+					gui.messageBox(_("The entered time slot overlaps with the following profile(s):\n{profiles}\nPlease choose a different date or time.").format(profiles = ", ".join(conflicts)),
 						_("Error"), wx.OK | wx.ICON_ERROR, self)
 					return
 				# Change display name if there is no profile of this name registered.
@@ -621,6 +630,16 @@ class GeneralSettingsPanel(gui.SettingsPanel):
 		except:
 			pass
 
+		# 18.12: bulk import and export of track comments.
+		trackCommentsButtonsHelper = gui.guiHelper.ButtonHelper(wx.HORIZONTAL)
+		# Translators: The label of a button to import track comments from a file.
+		importCommentsButton = trackCommentsButtonsHelper.addButton(self, label=_("&Import track comments..."))
+		importCommentsButton.Bind(wx.EVT_BUTTON, self.onImportTrackComments)
+		# Translators: The label of a button to export track comments to a file.
+		exportCommentsButton = trackCommentsButtonsHelper.addButton(self, label=_("E&xport track comments..."))
+		exportCommentsButton.Bind(wx.EVT_BUTTON, self.onExportTrackComments)
+		generalSettingsHelper.addItem(trackCommentsButtonsHelper)
+
 		# Translators: the label for a setting in SPL add-on settings to toggle top and bottom notification.
 		self.topBottomCheckbox = generalSettingsHelper.addItem(wx.CheckBox(self, label=_("Notify when located at &top or bottom of playlist viewer")))
 		self.topBottomCheckbox.SetValue(splconfig.SPLConfig["General"]["TopBottomAnnounce"])
@@ -641,6 +660,45 @@ class GeneralSettingsPanel(gui.SettingsPanel):
 		splconfig.SPLConfig["General"]["TopBottomAnnounce"] = self.topBottomCheckbox.Value
 		splconfig.SPLConfig["General"]["RequestsAlert"] = self.requestsAlertCheckbox.Value
 
+	# Translators: File types offered when importing or exporting track comments.
+	_trackCommentsWildcard = _("CSV files (*.csv)|*.csv|JSON Lines files (*.jsonl)|*.jsonl")
+
+	def onImportTrackComments(self, evt):
+		# Translators: The title of the dialog to choose a track comments file to import.
+		with wx.FileDialog(self, _("Import track comments"), wildcard=self._trackCommentsWildcard, style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as d:
+			if d.ShowModal() != wx.ID_OK: return
+			path = d.GetPath()
+		try:
+			count = splcomments.importComments(splconfig.trackComments, path)
+		except (IOError, OSError, ValueError, csv.Error) + splcomments.storeErrors:
+			log.debugWarning("SPL: cannot import track comments", exc_info=True)
+			# Translators: An error shown when track comments could not be imported.
+			gui.messageBox(_("Could not import track comments from {path}. Please make sure the file contains file names and comments.").format(path = path),
+				_("Error"), wx.OK | wx.ICON_ERROR, self)
+			return
+		# Translators: Presented when track comments were imported.
+		gui.messageBox(_("Imported {count} track comments.").format(count = count),
+			# Translators: The title of a message shown after importing track comments.
+			_("Track comments imported"), wx.OK | wx.ICON_INFORMATION, self)
+
+	def onExportTrackComments(self, evt):
+		# Translators: The title of the dialog to choose where to export track comments.
+		with wx.FileDialog(self, _("Export track comments"), wildcard=self._trackCommentsWildcard, style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT) as d:
+			if d.ShowModal() != wx.ID_OK: return
+			path = d.GetPath()
+		try:
+			count = splcomments.exportComments(splconfig.trackComments, path)
+		except (IOError, OSError) + splcomments.storeErrors:
+			log.debugWarning("SPL: cannot export track comments", exc_info=True)
+			# Translators: An error shown when track comments could not be exported.
+			gui.messageBox(_("Could not export track comments to {path}.").format(path = path),
+				_("Error"), wx.OK | wx.ICON_ERROR, self)
+			return
+		# Translators: Presented when track comments were exported.
+		gui.messageBox(_("Exported {count} track comments.").format(count = count),
+			# Translators: The title of a message shown after exporting track comments.
+			_("Track comments exported"), wx.OK | wx.ICON_INFORMATION, self)
+
 # A common alarm dialog (Alarms Center)
 # Based on NVDA core's find dialog code (implemented by the author of this add-on).
 # Extended in 2016 to handle microphone alarms.
@@ -1228,6 +1286,8 @@ class ColumnAnnouncementsPanel(gui.SettingsPanel):
 		curProfile["ColumnAnnouncement"]["ColumnOrder"] = self.columnOrder
 		curProfile["ColumnAnnouncement"]["IncludedColumns"] = self.includedColumns
 		curProfile["ColumnAnnouncement"]["IncludeColumnHeaders"] = self.columnHeadersCheckbox.Value
+		# 18.12: column announcement plan must reflect new settings.
+		splconfig.SPLConfig.compileColumnAnnouncementPlan()
 		self._curProfileSettings.clear()
 		if not _configApplyOnly: self._curProfileSettings = None
 
@@ -1480,6 +1540,12 @@ class AdvancedOptionsPanel(gui.SettingsPanel):
 			self.compatibilityList.SetSelection(selection)
 		except:
 			pass
+		# 18.12: status bar changes coming in quick succession (such as during library scans) can be coalesced.
+		# Translators: The label for a setting in SPL add-on settings/advanced options to set how long status bar changes are coalesced (0 processes every change).
+		self.statusBarCoalescing=advOptionsHelper.addLabeledControl(_("Process status bar changes at most every (milliseconds, 0 processes all changes)"), gui.nvdaControls.SelectOnFocusSpinCtrl, min=0, max=1000, initial=splconfig.SPLConfig["Advanced"]["StatusBarCoalescing"])
+		# 18.12: listener counts are recorded during time-based profiles.
+		# Translators: The label for a setting in SPL add-on settings/advanced options to set how often listener count is recorded while a time-based profile is active (0 disables it).
+		self.listenerSampleInterval=advOptionsHelper.addLabeledControl(_("Record listener count during time-based profiles every (seconds, 0 disables listener summary)"), gui.nvdaControls.SelectOnFocusSpinCtrl, min=0, max=600, initial=splconfig.SPLConfig["Advanced"]["ListenerSampleInterval"])
 		# 18.09: allow some dev snapshot users to test pilot features.
 		# Translators: A checkbox to enable pilot features (with risks involved).
 		self.pilotBuildCheckbox=advOptionsHelper.addItem(wx.CheckBox(self, label=_("Pilot features: I want to test and provide early &feedback on features under development")))
@@ -1515,6 +1581,8 @@ class AdvancedOptionsPanel(gui.SettingsPanel):
 		# 18.09: but only if add-on update feature is usable from Studio add-on.
 		splconfig.SPLConfig["Advanced"]["SPLConPassthrough"] = self.splConPassthroughCheckbox.Value
 		splconfig.SPLConfig["Advanced"]["CompatibilityLayer"] = self.compatibilityLayouts[self.compatibilityList.GetSelection()][0]
+		splconfig.SPLConfig["Advanced"]["StatusBarCoalescing"] = self.statusBarCoalescing.Value
+		splconfig.SPLConfig["Advanced"]["ListenerSampleInterval"] = self.listenerSampleInterval.Value
 		if splupdate and splupdate.isAddonUpdatingSupported() == splupdate.SPLUpdateErrorNone:
 			splconfig.SPLConfig["Update"]["AutoUpdateCheck"] = self.autoUpdateCheckbox.Value
 			splconfig.SPLConfig["Update"]["UpdateInterval"] = self.updateInterval.Value
@@ -1592,11 +1660,12 @@ class ResetDialog(wx.Dialog):
 			if self.resetTrackCommentsCheckbox.Value:
 				splconfig.trackComments.clear()
 			if self.resetEncodersCheckbox.Value:
-				if os.path.exists(os.path.join(globalVars.appArgs.configPath, "splStreamLabels.ini")):
-					os.remove(os.path.join(globalVars.appArgs.configPath, "splStreamLabels.ini"))
+				# 18.12: clean up encoder settings first, as pending changes are saved when doing so.
 				if "globalPlugins.splUtils.encoders" in sys.modules:
 					import globalPlugins.splUtils.encoders
 					globalPlugins.splUtils.encoders.cleanup()
+				if os.path.exists(os.path.join(globalVars.appArgs.configPath, "splStreamLabels.ini")):
+					os.remove(os.path.join(globalVars.appArgs.configPath, "splStreamLabels.ini"))
 			_configDialogOpened = False
 			# Translators: A dialog message shown when settings were reset to defaults.
 			wx.CallAfter(gui.messageBox, _("Successfully applied default add-on settings."),
@@ -3,6 +3,12 @@
 # Copyright 2017-2018 Joseph Lee and others, released under GPL.
 # Provides debug output and other diagnostics probes.
 
+import sys
+py3 = sys.version.startswith("3")
+import os
+import time
+import json
+import contextlib
 from logHandler import log
 
 import globalVars
@@ -12,3 +18,83 @@ def debugOutput(message):
 	if SPLDebuggingFramework:
 		log.debug("SPL: %s"%message)
 
+# 18.12: startup profiler.
+# Records how long each app module startup phase and each action handler called during startup takes.
+# Only active if --spl-profilestartup command-line switch is present, and the report is written to the log and to a JSON file in user config folder.
+_startupTimer = time.perf_counter if py3 else time.clock
+_startupProfile = None
+
+class StartupProfile(object):
+	"""A record of startup phases and action handlers along with their durations in seconds.
+	Phases may be recorded from more than one thread (such as Studio handle finder), hence entries are only ever appended.
+	"""
+
+	def __init__(self):
+		self.started = _startupTimer()
+		self.phases = []
+		self.handlers = []
+
+	def report(self):
+		return {
+			"version": 1,
+			"total": _startupTimer() - self.started,
+			"phases": [{"phase": phase, "duration": duration} for phase, duration in self.phases],
+			"handlers": [{"action": action, "handler": handler, "duration": duration} for action, handler, duration in self.handlers],
+		}
+
+def beginStartupProfile():
+	global _startupProfile
+	_startupProfile = StartupProfile() if "--spl-profilestartup" in globalVars.appArgsExtra else None
+
+# Times the enclosed block as the named startup phase if the profiler is active.
+@contextlib.contextmanager
+def startupPhase(name):
+	start = _startupTimer() if _startupProfile is not None else None
+	try:
+		yield
+	finally:
+		# Profile may have been closed while this phase was running (Studio handle finder, for instance).
+		profile = _startupProfile
+		if profile is not None and start is not None:
+			profile.phases.append((name, _startupTimer() - start))
+
+def _handlerName(handler):
+	owner = getattr(handler, "__self__", None)
+	if owner is not None:
+		return "%s.%s.%s"%(owner.__class__.__module__, owner.__class__.__name__, handler.__name__)
+	return "%s.%s"%(getattr(handler, "__module__", None), getattr(handler, "__name__", repr(handler)))
+
+# Notify an action, timing each handler if the profiler is active.
+# Same semantics as Action.notify, as handler exceptions are logged and do not stop other handlers from running.
+def notifyAction(action, actionName, **kwargs):
+	profile = _startupProfile
+	if profile is None:
+		action.notify(**kwargs)
+		return
+	from extensionPoints.util import callWithSupportedKwargs
+	for handler in action.handlers:
+		start = _startupTimer()
+		try:
+			callWithSupportedKwargs(handler, **kwargs)
+		except:
+			log.exception("Error running handler %r for %s"%(handler, actionName))
+		profile.handlers.append((actionName, _handlerName(handler), _startupTimer() - start))
+
+# Write the startup profile to the log and to a report file, then close the profiler.
+def endStartupProfile():
+	global _startupProfile
+	profile = _startupProfile
+	if profile is None: return
+	_startupProfile = None
+	report = profile.report()
+	lines = ["SPL: startup profile, total %.3f seconds"%report["total"]]
+	for entry in report["phases"]:
+		lines.append("phase %s: %.3f seconds"%(entry["phase"], entry["duration"]))
+	for entry in report["handlers"]:
+		lines.append("%s handler %s: %.3f seconds"%(entry["action"], entry["handler"], entry["duration"]))
+	log.info("\n".join(lines))
+	try:
+		with open(os.path.join(globalVars.appArgs.configPath, "splstartupprofile.json"), "w") as f:
+			json.dump(report, f, indent=1)
+	except (IOError, OSError):
+		log.debugWarning("SPL: cannot write startup profile report", exc_info=True)
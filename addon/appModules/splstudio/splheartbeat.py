@@ -0,0 +1,99 @@
+# SPL Studio heartbeat
+# An app module and global plugin package for NVDA
+# Copyright 2018 Joseph Lee and others, released under GPL.
+# Samples Studio API values on a shared schedule and lets subscribers know about them.
+# Features such as background library scan detection subscribe to values they are interested in instead of polling Studio on their own.
+
+from winUser import user32
+from . import splbase
+from . import spltimers
+from .spldebugging import debugOutput
+
+# Studio API values that can be sampled, as (wParam, lParam) pairs for Studio API calls.
+# Microphone status requires Studio 5.20 or later.
+studioValues = {
+	"libraryScan": (1, 32),
+	"playlistItemCount": (0, 124),
+	"listenerCount": (0, 35),
+	"microphone": (2, 39),
+}
+
+class StudioHeartbeat(object):
+	"""Samples subscribed Studio API values at a set interval (in seconds) using a timer from the add-on timer wheel.
+	Only values with subscribers are sampled, each once per heartbeat no matter how many subscribers there are.
+	Subscribers are called with the new and the previous value, either when the value changes or on every heartbeat if asked to do so.
+	Heartbeat stops by itself when Studio window is gone.
+	"""
+
+	def __init__(self, interval=1):
+		self.interval = interval
+		self._subscribers = {}
+		# Last sampled values, None if not yet sampled.
+		self.values = {}
+		self._timer = None
+
+	# Handler is called with value and previous value.
+	# If changesOnly is False, handler is called after every sample (useful for progress reports).
+	def subscribe(self, name, handler, changesOnly=True):
+		if name not in studioValues:
+			raise ValueError("Unknown Studio value: %s"%name)
+		subscribers = self._subscribers.setdefault(name, [])
+		if not any(subscriber == handler for subscriber, subscriberChangesOnly in subscribers):
+			subscribers.append((handler, changesOnly))
+
+	def unsubscribe(self, name, handler):
+		subscribers = self._subscribers.get(name)
+		if not subscribers: return
+		subscribers[:] = [(subscriber, changesOnly) for subscriber, changesOnly in subscribers if subscriber != handler]
+		if not subscribers:
+			del self._subscribers[name]
+			self.values.pop(name, None)
+
+	@property
+	def running(self):
+		return self._timer is not None and self._timer.IsRunning()
+
+	def start(self):
+		if self.running: return
+		self._timer = spltimers.callEvery(self.interval, self.beat)
+		debugOutput("Studio heartbeat started")
+
+	def stop(self):
+		if self._timer is not None:
+			self._timer.Stop()
+			self._timer = None
+		self.values.clear()
+
+	def clear(self):
+		self.stop()
+		self._subscribers.clear()
+
+	def beat(self):
+		# Only proceed if Studio handle is valid.
+		if not user32.FindWindowW(u"SPLStudio", None):
+			debugOutput("Studio window is gone, stopping Studio heartbeat")
+			self.stop()
+			return
+		for name, subscribers in list(self._subscribers.items()):
+			wParam, lParam = studioValues[name]
+			value = splbase.studioAPI(wParam, lParam)
+			# Studio handle is not known yet.
+			if value is None: continue
+			previous = self.values.get(name)
+			self.values[name] = value
+			for handler, changesOnly in list(subscribers):
+				if changesOnly and value == previous: continue
+				try:
+					handler(value, previous)
+				except:
+					from logHandler import log
+					log.exception("SPL: error running Studio heartbeat subscriber %r for %s"%(handler, name))
+
+# The Studio heartbeat used by the add-on.
+heartbeat = StudioHeartbeat()
+
+def subscribe(name, handler, changesOnly=True):
+	heartbeat.subscribe(name, handler, changesOnly=changesOnly)
+
+def unsubscribe(name, handler):
+	heartbeat.unsubscribe(name, handler)
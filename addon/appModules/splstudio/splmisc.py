@@ -8,7 +8,6 @@ import sys
 py3 = sys.version.startswith("3")
 import weakref
 import os
-import threading
 from _csv import reader # For cart explorer.
 import gui
 import wx
@@ -19,6 +18,7 @@ from winUser import user32
 from . import splbase
 from .spldebugging import debugOutput
 from . import splactions
+from . import spltimers
 
 # Python 3 preparation (a compatibility layer until Six module is included).
 rangeGen = range if py3 else xrange
@@ -241,39 +241,49 @@ class SPLTimeRangeDialog(wx.Dialog):
 
 # Cart Explorer helper.
 
-def _populateCarts(carts, cartlst, modifier, standardEdition=False, refresh=False):
+def _populateCarts(cartlst, modifier, standardEdition=False):
 	# The real cart string parser, a helper for cart explorer for building cart entries.
+	# 18.12: returns a dictionary of cart keys and names for this bank, with slots obtained in a single pass (identical entries no longer share a slot).
+	bank = {}
 	# 5.2: Discard number row if SPL Standard is in use.
 	if standardEdition: cartlst = cartlst[:12]
 	# 18.08 (optimization): this is number row (except on Studio Standard), so assign identifier based on the below static list.
 	numberRow = "1234567890-="
-	for entry in cartlst:
+	# Pos between 1 and 12 = function carts, 13 through 24 = number row carts, modifiers are checked.
+	for pos, entry in enumerate(cartlst, 1):
 		# An unassigned cart is stored with three consecutive commas, so skip it.
-		# 17.04: If refresh is on, the cart we're dealing with is the actual carts dictionary that was built previously.
-		noEntry = ",,," in entry
-		if noEntry and not refresh: continue
-		# Pos between 1 and 12 = function carts, 13 through 24 = number row carts, modifiers are checked.
-		pos = cartlst.index(entry)+1
+		if ",,," in entry: continue
 		# If a cart name has commas or other characters, SPL surrounds the cart name with quotes (""), so parse it as well.
 		if not entry.startswith('"'): cartName = entry.split(",")[0]
 		else: cartName = entry.split('"')[1]
 		if pos <= 12: identifier = "f%s"%(pos)
 		# For number row (except Studio Standard), subtract 13 because pos starts at 1, so by the time it comes to number row, it'll be 13.
 		else: identifier = numberRow[pos-13]
-		cart = identifier if not modifier else "+".join([modifier, identifier])
-		if noEntry and refresh:
-			if cart in carts: del carts[cart]
-		else:
-			carts[cart] = cartName
+		bank[identifier if not modifier else "+".join([modifier, identifier])] = cartName
+	return bank
+
+# Parsed cart banks.
+# 18.12: key = cart bank path, value = (modification time, size, cart entries for this bank).
+# Replaces cart file timestamps list, and lets unchanged banks be skipped when cart explorer is refreshed.
+_cartBanks = {}
+
+def _loadCartBank(cartFile, modifier, standardEdition=False):
+	stat = os.stat(cartFile)
+	cached = _cartBanks.get(cartFile)
+	if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+		return cached[2], False
+	with open(cartFile) as cartInfo:
+		cl = [row for row in reader(cartInfo)]
+	bank = _populateCarts(cl[1], modifier, standardEdition=standardEdition)
+	_cartBanks[cartFile] = (stat.st_mtime, stat.st_size, bank)
+	return bank, True
 
-# Cart file timestamps.
-_cartEditTimestamps = None
 # Initialize Cart Explorer i.e. fetch carts.
 # Cart files list is for future use when custom cart names are used.
 # if told to refresh, timestamps will be checked and updated banks will be reassigned.
 # Carts dictionary is used if and only if refresh is on, as it'll modify live carts.
+# 18.12: only cart slots that have changed since the bank was last parsed are updated when refreshing.
 def cartExplorerInit(StudioTitle, cartFiles=None, refresh=False, carts=None):
-	global _cartEditTimestamps
 	debugOutput("refreshing Cart Explorer" if refresh else "preparing cart Explorer")
 	# Use cart files in SPL's data folder to build carts dictionary.
 	# use a combination of SPL user name and static cart location to locate cart bank files.
@@ -292,10 +302,7 @@ def cartExplorerInit(StudioTitle, cartFiles=None, refresh=False, carts=None):
 		if userNameIndex >= 0:
 			cartFiles = [StudioTitle[userNameIndex+2:]+" "+cartFile for cartFile in cartFiles]
 	faultyCarts = False
-	if not refresh:
-		_cartEditTimestamps = []
 	for f in cartFiles:
-		# Only do this if told to build cart banks from scratch, as refresh flag is set if cart explorer is active in the first place.
 		try:
 			mod = f.split()[-2] # Checking for modifier string such as ctrl.
 			# Todo: Check just in case some SPL flavors doesn't ship with a particular cart file.
@@ -308,17 +315,27 @@ def cartExplorerInit(StudioTitle, cartFiles=None, refresh=False, carts=None):
 			faultyCarts = True
 			continue
 		debugOutput("examining carts from file %s"%cartFile)
-		cartTimestamp = os.path.getmtime(cartFile)
-		if refresh and _cartEditTimestamps[cartFiles.index(f)] == cartTimestamp:
-			debugOutput("no changes to cart bank, skipping")
-			continue
-		_cartEditTimestamps.append(cartTimestamp)
-		with open(cartFile) as cartInfo:
-			cl = [row for row in reader(cartInfo)]
+		# Previously parsed entries are needed to find out which slots have changed.
+		previous = _cartBanks[cartFile][2] if refresh and cartFile in _cartBanks else {}
 		# 17.04 (optimization): let empty string represent main cart bank to avoid this being partially consulted up to 24 times.
 		# The below method will just check for string length, which is faster than looking for specific substring.
-		_populateCarts(carts, cl[1], mod if mod != "main" else "", standardEdition=carts["standardLicense"], refresh=refresh) # See the comment for _populate method above.
-		if not refresh:
+		try:
+			bank, changed = _loadCartBank(cartFile, mod if mod != "main" else "", standardEdition=carts["standardLicense"])
+		except (IOError, OSError, IndexError):
+			faultyCarts = True
+			continue
+		if refresh and not changed:
+			debugOutput("no changes to cart bank, skipping")
+			continue
+		for cart in previous:
+			if cart not in bank: carts.pop(cart, None)
+		updated = [cart for cart, cartName in bank.items() if previous.get(cart) != cartName]
+		for cart in updated:
+			carts[cart] = bank[cart]
+		if refresh:
+			carts["modifiedBanks"].append(mod)
+			debugOutput("cart slots updated: %s"%(len(updated)+len([cart for cart in previous if cart not in bank])))
+		else:
 			debugOutput("carts processed so far: %s"%(len(carts)-1))
 	carts["faultyCarts"] = faultyCarts
 	debugOutput("total carts processed: %s"%(len(carts)-2))
@@ -329,6 +346,184 @@ def cartExplorerInit(StudioTitle, cartFiles=None, refresh=False, carts=None):
 def cartExplorerRefresh(studioTitle, currentCarts):
 	return cartExplorerInit(studioTitle, refresh=True, carts=currentCarts)
 
+# 18.12: cart bank watcher.
+# Checks cart bank files for changes while cart explorer is active, so carts are refreshed without waiting for cart edit mode to be toggled.
+
+class CartBankWatcher(object):
+	"""Polls cart banks parsed by cart explorer for changes in modification time or size.
+	Polling starts at the minimum interval and backs off up to the maximum interval while banks stay the same.
+	A burst of edits (such as saving several banks) is refreshed once the banks have been quiet for the settle time, with the live carts dictionary updated in place.
+	"""
+
+	def __init__(self, studioTitle, carts, onRefresh=None, minInterval=1, maxInterval=8, settleTime=0.5):
+		self.studioTitle = studioTitle
+		self.carts = carts
+		self.onRefresh = onRefresh
+		self.minInterval = minInterval
+		self.maxInterval = maxInterval
+		self.settleTime = settleTime
+		self._interval = minInterval
+		self._pollTimer = None
+		self._refreshTimer = None
+		self._signatures = {}
+
+	def _bankSignatures(self):
+		signatures = {}
+		for cartFile in _cartBanks:
+			try:
+				stat = os.stat(cartFile)
+				signatures[cartFile] = (stat.st_mtime, stat.st_size)
+			except OSError:
+				signatures[cartFile] = None
+		return signatures
+
+	def start(self):
+		self._signatures = self._bankSignatures()
+		self._interval = self.minInterval
+		self._schedulePoll()
+
+	def stop(self):
+		for timer in (self._pollTimer, self._refreshTimer):
+			if timer is not None and timer.IsRunning(): timer.Stop()
+		self._pollTimer = None
+		self._refreshTimer = None
+
+	def _schedulePoll(self):
+		self._pollTimer = spltimers.callLater(self._interval, self._poll)
+
+	# Check banks right away, such as when cart edit mode is turned off.
+	def poke(self):
+		if self._pollTimer is None: return
+		self._pollTimer.Stop()
+		self._interval = self.minInterval
+		self._poll()
+
+	def _poll(self):
+		signatures = self._bankSignatures()
+		if signatures != self._signatures:
+			self._signatures = signatures
+			self._interval = self.minInterval
+			# Wait for the edits to settle before refreshing.
+			if self._refreshTimer is not None: self._refreshTimer.Stop()
+			self._refreshTimer = spltimers.callLater(self.settleTime, self._refresh)
+		else:
+			self._interval = min(self._interval * 2, self.maxInterval)
+		self._schedulePoll()
+
+	def _refresh(self):
+		self._refreshTimer = None
+		cartExplorerRefresh(self.studioTitle, self.carts)
+		debugOutput("cart banks changed: %s"%", ".join(self.carts["modifiedBanks"]))
+		if self.onRefresh is not None and self.carts["modifiedBanks"]:
+			self.onRefresh()
+
+# 18.12: cart name search.
+
+# Python 2's CSV module returns cart names as bytes in the system (ANSI) code page, whereas searched text is unicode.
+def _cartNameText(cartName):
+	if py3 or isinstance(cartName, unicode): return cartName
+	return cartName.decode("mbcs" if sys.platform == "win32" else "utf-8", "replace")
+
+class CartNameIndex(object):
+	"""Cart names from the carts dictionary, lowercased once so cart names can be searched as the user types.
+	Results list carts whose names start with the searched text first, followed by carts with the text elsewhere in their names.
+	Gesture names map cart keys as used by cart banks (such as ctrl+f1) to NVDA gesture names (such as control+f1) so carts can be played.
+	"""
+
+	def __init__(self, carts, gestureNames=None):
+		# Carts dictionary also records cart explorer flags (whose values are not cart names).
+		self._entries = sorted((_cartNameText(cartName).lower(), _cartNameText(cartName), cart) for cart, cartName in carts.items() if isinstance(cartName, str if py3 else basestring))
+		self.gestureNames = gestureNames if gestureNames is not None else {}
+
+	def __len__(self):
+		return len(self._entries)
+
+	# Returns a list of (cart name, cart key) tuples.
+	def search(self, text):
+		text = text.lower()
+		prefixMatches, otherMatches = [], []
+		for lowerName, cartName, cart in self._entries:
+			position = lowerName.find(text)
+			if position == 0: prefixMatches.append((cartName, cart))
+			elif position > 0: otherMatches.append((cartName, cart))
+		return prefixMatches + otherMatches
+
+class SPLCartFinderDialog(wx.Dialog):
+	"""Lists carts whose names contain the entered text, playing the selected cart when OK is pressed.
+	"""
+
+	_instance = None
+
+	def __new__(cls, parent, *args, **kwargs):
+		# Make this a singleton and prompt an error dialog if it isn't.
+		if _findDialogOpened:
+			raise RuntimeError("An instance of find dialog is opened")
+		inst = cls._instance() if cls._instance else None
+		if not inst:
+			return super(cls, cls).__new__(cls, parent, *args, **kwargs)
+		return inst
+
+	def __init__(self, parent, cartIndex):
+		inst = SPLCartFinderDialog._instance() if SPLCartFinderDialog._instance else None
+		if inst:
+			return
+		# Use a weakref so the instance can die.
+		SPLCartFinderDialog._instance = weakref.ref(self)
+
+		# Translators: The title of a dialog to find carts by name.
+		super(SPLCartFinderDialog, self).__init__(parent, wx.ID_ANY, _("Find cart"))
+		self.cartIndex = cartIndex
+		self.matches = []
+
+		mainSizer = wx.BoxSizer(wx.VERTICAL)
+		cartFinderHelper = gui.guiHelper.BoxSizerHelper(self, orientation=wx.VERTICAL)
+		splactions.SPLActionAppTerminating.register(self.onAppTerminate)
+
+		# Translators: The label of a field to enter part of a cart name.
+		self.findEntry = cartFinderHelper.addLabeledControl(_("Enter part of the cart &name:"), wx.TextCtrl)
+		self.findEntry.Bind(wx.EVT_TEXT, self.onFindEntryChange)
+		# Translators: The label of a list of carts matching the entered text.
+		self.cartsList = cartFinderHelper.addLabeledControl(_("&Carts:"), wx.ListBox, choices=[])
+
+		cartFinderHelper.addDialogDismissButtons(self.CreateButtonSizer(wx.OK | wx.CANCEL))
+		self.Bind(wx.EVT_BUTTON,self.onOk,id=wx.ID_OK)
+		self.Bind(wx.EVT_BUTTON,self.onCancel,id=wx.ID_CANCEL)
+		mainSizer.Add(cartFinderHelper.sizer, border = gui.guiHelper.BORDER_FOR_DIALOGS, flag=wx.ALL)
+		mainSizer.Fit(self)
+		self.Sizer = mainSizer
+		self.Center(wx.BOTH | wx.CENTER_ON_SCREEN)
+		self.findEntry.SetFocus()
+
+	def onFindEntryChange(self, evt):
+		text = self.findEntry.Value
+		self.matches = self.cartIndex.search(text) if text else []
+		# Translators: An entry in cart finder results (example: Station ID (shift+f1)).
+		self.cartsList.SetItems([_("{cartName} ({cart})").format(cartName = cartName, cart = cart) for cartName, cart in self.matches])
+		if self.matches: self.cartsList.SetSelection(0)
+
+	def onOk(self, evt):
+		global _findDialogOpened
+		selection = self.cartsList.Selection
+		if self.matches and selection != wx.NOT_FOUND and user32.FindWindowW(u"SPLStudio", None):
+			cart = self.matches[selection][1]
+			gestureName = self.cartIndex.gestureNames.get(cart)
+			if gestureName is not None:
+				import keyboardHandler
+				gesture = keyboardHandler.KeyboardInputGesture.fromName(gestureName)
+				# If this is called right away, the cart key would be sent to this dialog.
+				wx.CallLater(100, gesture.send)
+		self.Destroy()
+		_findDialogOpened = False
+
+	def onCancel(self, evt):
+		self.Destroy()
+		global _findDialogOpened
+		_findDialogOpened = False
+
+	def onAppTerminate(self):
+		# Call cancel function when the app terminates so the dialog can be closed.
+		self.onCancel(None)
+
 # Countdown timer.
 # This is utilized by many services, chiefly profile triggers routine.
 
@@ -342,10 +537,10 @@ class SPLCountdownTimer(object):
 		self.threshold = threshold
 
 	def Start(self):
-		self.timer = wx.PyTimer(self.countdown)
 		ui.message(_("Countdown started"))
 		# #58 (18.04.1): timers must be started from main thread.
-		wx.CallAfter(self.timer.Start, 1000)
+		# 18.12: taken care of by add-on timer wheel.
+		self.timer = spltimers.callEvery(1, self.countdown)
 
 	def Stop(self):
 		self.timer.Stop()
@@ -364,6 +559,162 @@ class SPLCountdownTimer(object):
 			ui.message(str(self.duration))
 
 
+# 18.12: library scan telemetry.
+# Library scan throughput and estimated time to completion, computed from scan counts sampled by Studio heartbeat.
+# A small history of past scans is kept so scan performance can be compared over time (such as after moving music libraries).
+
+class LibraryScanTelemetry(object):
+	"""Keeps scan rate (items per second, smoothed with an exponential moving average) for the library scan in progress and a history of completed scans.
+	Time to completion is estimated from the library size seen at the end of the last scan.
+	History entries record when a scan started, how long it took (in seconds) and how many items were in the library afterwards, and are saved as JSON.
+	"""
+
+	# Weight given to the newest rate sample.
+	smoothing = 0.3
+	historySize = 20
+
+	def __init__(self, path=None, clock=None):
+		import time
+		self.path = path
+		self._clock = clock if clock is not None else time.time
+		self.history = self._load()
+		self.reset()
+
+	def reset(self):
+		self.started = None
+		self.items = 0
+		self.rate = None
+		self._lastSample = None
+
+	@property
+	def scanning(self):
+		return self.started is not None
+
+	# Record the number of items scanned so far.
+	def sample(self, scanCount):
+		now = self._clock()
+		if self.started is None:
+			self.started = now
+			self._lastSample = (now, scanCount)
+		else:
+			lastTime, lastCount = self._lastSample
+			elapsed = now - lastTime
+			# Count may go down if a new scan starts before the previous one is noticed as finished.
+			if elapsed > 0 and scanCount >= lastCount:
+				rate = (scanCount - lastCount) / float(elapsed)
+				self.rate = rate if self.rate is None else self.smoothing * rate + (1 - self.smoothing) * self.rate
+				self._lastSample = (now, scanCount)
+		self.items = scanCount
+
+	# Items expected at the end of the scan (library size after the last scan), or None if not known.
+	@property
+	def expectedItems(self):
+		return self.history[-1]["items"] if self.history else None
+
+	# Estimated seconds until scan completion, or None if it cannot be estimated.
+	def eta(self):
+		expectedItems = self.expectedItems
+		if not self.rate or expectedItems is None or expectedItems <= self.items: return None
+		return (expectedItems - self.items) / self.rate
+
+	# Record a completed scan and the library size afterwards, returning the new history entry.
+	def finish(self, libraryItems):
+		if self.started is None: return None
+		entry = {"started": self.started, "duration": self._clock() - self.started, "items": libraryItems}
+		self.history.append(entry)
+		del self.history[:-self.historySize]
+		self.reset()
+		self._save()
+		return entry
+
+	def _load(self):
+		if self.path is None or not os.path.isfile(self.path): return []
+		import json
+		try:
+			with open(self.path, "r") as f:
+				history = json.load(f)["scans"]
+			return [entry for entry in history if isinstance(entry, dict) and {"started", "duration", "items"} <= set(entry)][-self.historySize:]
+		except (IOError, OSError, ValueError, KeyError, TypeError):
+			debugOutput("cannot read library scan history")
+			return []
+
+	def _save(self):
+		if self.path is None: return
+		import json
+		try:
+			splbase.atomicWrite(self.path, json.dumps({"version": 1, "scans": self.history}, indent=1).encode("utf-8"))
+		except (IOError, OSError):
+			debugOutput("cannot save library scan history")
+
+# 18.12: listener count sampler.
+# Listener counts are recorded while a time-based broadcast profile is active so the show can be summarized when it ends.
+
+class ListenerCountSampler(object):
+	"""Records listener counts reported by Studio heartbeat at a set interval (in seconds) into an unsigned integer array, one session (show) at a time.
+	Peak, time at peak and the running total are updated as samples come in, so ending a session costs no more than reading them back.
+	"""
+
+	def __init__(self, clock=None):
+		import time
+		self._clock = clock if clock is not None else time.time
+		self.profile = None
+		self.reset()
+
+	def reset(self):
+		import array
+		self.samples = array.array("I")
+		self.started = None
+		self.peak = 0
+		self.peakTime = None
+		self._total = 0
+		self._lastSample = None
+
+	@property
+	def active(self):
+		return self.profile is not None
+
+	# Begin recording listener counts for the given profile, with interval of 0 meaning no recording.
+	def startSession(self, profile, interval):
+		if self.active: self.endSession()
+		if not interval: return
+		self.reset()
+		self.profile = profile
+		self.interval = interval
+		self.started = self._clock()
+		from . import splheartbeat
+		splheartbeat.subscribe("listenerCount", self.sample, changesOnly=False)
+
+	# Called by Studio heartbeat every second, so record a sample only if the interval has passed.
+	def sample(self, listenerCount, previous=None):
+		now = self._clock()
+		if self._lastSample is not None and now - self._lastSample < self.interval: return
+		self._lastSample = now
+		# Studio may report negative values while not streaming.
+		listenerCount = max(listenerCount, 0)
+		self.samples.append(listenerCount)
+		self._total += listenerCount
+		if self.peakTime is None or listenerCount > self.peak:
+			self.peak = listenerCount
+			self.peakTime = now
+
+	# Stop recording, returning a summary dictionary (or None if no samples were recorded).
+	def endSession(self):
+		if not self.active: return None
+		from . import splheartbeat
+		splheartbeat.unsubscribe("listenerCount", self.sample)
+		summary = None
+		if self.samples:
+			summary = {"profile": self.profile, "started": self.started, "duration": self._clock() - self.started, "samples": len(self.samples), "peak": self.peak, "peakTime": self.peakTime, "average": self._total / float(len(self.samples))}
+		self.profile = None
+		self.reset()
+		return summary
+
+def announceListenerSummary(summary):
+	if summary is None: return
+	import time
+	# Translators: announced when a time-based profile ends, summarizing listener counts during the show (example output: Listeners during Morning show: peak 25 at 08:15, average 18).
+	ui.message(_("Listeners during {profile}: peak {peak} at {peakTime}, average {average}").format(profile = summary["profile"], peak = summary["peak"], peakTime = time.strftime("%H:%M", time.localtime(summary["peakTime"])), average = int(round(summary["average"]))))
+
 # Metadata and encoders management, including connection, announcement and so on.
 
 # Gather streaming flags into a list.
@@ -436,10 +787,10 @@ _earlyMetadataAnnouncer = None
 def _earlyMetadataAnnouncerInternal(status, startup=False):
 	global _earlyMetadataAnnouncer
 	if _earlyMetadataAnnouncer is not None:
-		_earlyMetadataAnnouncer.cancel()
+		_earlyMetadataAnnouncer.Stop()
 		_earlyMetadataAnnouncer = None
-	_earlyMetadataAnnouncer = threading.Timer(2, _metadataAnnouncerInternal, args=[status], kwargs={"startup": startup})
-	_earlyMetadataAnnouncer.start()
+	# 18.12: managed by add-on timer wheel.
+	_earlyMetadataAnnouncer = spltimers.callLater(2, _metadataAnnouncerInternal, status, startup=startup)
 
 # Delay the action handler if Studio handle is not found.
 _delayMetadataAction = False
@@ -0,0 +1,242 @@
+# SPL Studio timer services
+# An app module and global plugin package for NVDA
+# Copyright 2018 Joseph Lee and others, released under GPL.
+# Provides a timer wheel used by countdowns, alarms, profile triggers and other timed add-on features.
+# Timers are driven by a single tick source and run on the main thread, ordered by deadline and then by the order they were scheduled.
+# The clock and the tick source can be replaced so schedules can be examined without waiting in real time.
+
+import sys
+py3 = sys.version.startswith("3")
+import time
+import math
+import threading
+
+# Python 3 preparation (a compatibility layer until Six module is included).
+rangeGen = range if py3 else xrange
+
+# Seconds from an arbitrary point in time, which should not go back when system clock changes.
+# Python 2 has no monotonic clock, and the wall clock jumps back and forth with daylight saving time fixes, time synchronization and manual edits.
+# Timers would then freeze until the clock catches up or fire all at once, so use milliseconds since Windows started instead.
+def _defaultClockFactory():
+	if py3: return time.monotonic
+	try:
+		import ctypes
+		getTickCount64 = ctypes.windll.kernel32.GetTickCount64
+		getTickCount64.restype = ctypes.c_ulonglong
+	except (ImportError, AttributeError):
+		return time.time
+	return lambda: getTickCount64() / 1000.0
+
+_defaultClock = _defaultClockFactory()
+
+def _isMainThread():
+	if py3: return threading.current_thread() is threading.main_thread()
+	return isinstance(threading.current_thread(), threading._MainThread)
+
+class WheelTimer(object):
+	"""A timer scheduled on the timer wheel, with a wx.Timer-like interface.
+	Interval is None for one-shot timers.
+	"""
+
+	def __init__(self, wheel, func, args, kwargs, interval):
+		self._wheel = wheel
+		self._func = func
+		self._args = args
+		self._kwargs = kwargs
+		self.interval = interval
+		self._deadline = None
+		self._seq = 0
+
+	def Stop(self):
+		self._wheel._cancel(self)
+
+	def IsRunning(self):
+		return self._deadline is not None
+
+	def __repr__(self):
+		return "<WheelTimer %r, interval %s>"%(self._func, self.interval)
+
+class TimerWheel(object):
+	"""A hashed timer wheel: timers are placed in slots by the tick they are due, and each tick looks at one slot only.
+	Timers due past a full turn of the wheel stay in their slot until their tick comes around.
+	Resolution is in seconds, clock is a function returning seconds, and the tick source (default: wx.PyTimer) must provide Start, Stop and IsRunning methods.
+	Without a tick source, ticks are driven by calling tick method, which also works out missed ticks from the clock.
+	"""
+
+	def __init__(self, resolution=0.1, slots=512, clock=None, tickSource=None):
+		self.resolution = resolution
+		self._slots = [[] for slot in rangeGen(slots)]
+		self._clock = clock if clock is not None else _defaultClock
+		self._origin = self._clock()
+		self._lastTick = 0
+		self._timers = 0
+		self._seq = 0
+		self._lock = threading.RLock()
+		self._tickSource = tickSource
+		self._manualTicks = False
+
+	# Replace the clock, such as when testing schedules without waiting.
+	# Pending timers keep their positions relative to the current tick.
+	def setClock(self, clock, manualTicks=True):
+		with self._lock:
+			if self._tickSource is not None and self._tickSource.IsRunning(): self._tickSource.Stop()
+			self._clock = clock
+			self._origin = clock() - self._lastTick * self.resolution
+			self._manualTicks = manualTicks
+
+	def _currentTick(self):
+		# Allow for floating point errors when the clock lands exactly on a tick.
+		return int((self._clock() - self._origin) / self.resolution + 1e-6)
+
+	def __len__(self):
+		return self._timers
+
+	@property
+	def timers(self):
+		with self._lock:
+			return sorted((timer for slot in self._slots for timer in slot), key=lambda timer: (timer._deadline, timer._seq))
+
+	def callLater(self, delay, func, *args, **kwargs):
+		return self._schedule(WheelTimer(self, func, args, kwargs, None), delay)
+
+	def callEvery(self, interval, func, *args, **kwargs):
+		if interval <= 0:
+			raise ValueError("Repeating timer interval must be positive")
+		return self._schedule(WheelTimer(self, func, args, kwargs, interval), interval)
+
+	def _ticksFor(self, delay):
+		return max(int(math.ceil(delay / float(self.resolution))), 1)
+
+	def _schedule(self, timer, delay):
+		with self._lock:
+			self._place(timer, max(self._currentTick(), self._lastTick) + self._ticksFor(delay))
+		return timer
+
+	def _place(self, timer, deadline):
+		timer._deadline = deadline
+		self._seq += 1
+		timer._seq = self._seq
+		self._slots[deadline % len(self._slots)].append(timer)
+		self._timers += 1
+		if self._timers == 1: self._startTicking()
+
+	def _cancel(self, timer):
+		with self._lock:
+			if timer._deadline is None: return
+			# Timers about to be run by the current tick are no longer in their slots.
+			try:
+				self._slots[timer._deadline % len(self._slots)].remove(timer)
+				self._timers -= 1
+			except ValueError:
+				pass
+			timer._deadline = None
+			if not self._timers: self._stopTicking()
+
+	def _startTicking(self):
+		if self._manualTicks: return
+		import wx
+		if self._tickSource is None:
+			self._tickSource = wx.PyTimer(self.tick)
+		# Timers must be started from main thread.
+		if _isMainThread(): self._startTickingFromMainThread()
+		else: wx.CallAfter(self._startTickingFromMainThread)
+
+	def _startTickingFromMainThread(self):
+		with self._lock:
+			if self._timers and not self._tickSource.IsRunning(): self._tickSource.Start(int(self.resolution * 1000))
+
+	def _stopTicking(self):
+		if self._manualTicks or self._tickSource is None: return
+		if self._tickSource.IsRunning(): self._tickSource.Stop()
+
+	# Run timers that are due, in deadline order.
+	# Timers that became due while ticks were missed (such as when the system was busy) are run once.
+	def tick(self):
+		with self._lock:
+			currentTick = self._currentTick()
+			# Should a clock go back after all, move the origin so pending timers keep their places instead of waiting for the clock to catch up.
+			if currentTick < self._lastTick:
+				self._origin = self._clock() - self._lastTick * self.resolution
+				return
+			if currentTick == self._lastTick: return
+			slotCount = len(self._slots)
+			if currentTick - self._lastTick >= slotCount: ticks = rangeGen(slotCount)
+			else: ticks = rangeGen(self._lastTick+1, currentTick+1)
+			due = []
+			for tick in ticks:
+				slot = self._slots[tick % slotCount]
+				if not slot: continue
+				due.extend(timer for timer in slot if timer._deadline <= currentTick)
+				slot[:] = [timer for timer in slot if timer._deadline > currentTick]
+			self._lastTick = currentTick
+			self._timers -= len(due)
+			due.sort(key=lambda timer: (timer._deadline, timer._seq))
+			for timer in due:
+				if timer.interval is None: continue
+				# Repeating timers keep their pace, skipping intervals that were missed altogether.
+				interval = self._ticksFor(timer.interval)
+				nextDeadline = timer._deadline + interval
+				if nextDeadline <= currentTick:
+					nextDeadline += ((currentTick - nextDeadline) // interval + 1) * interval
+				self._place(timer, nextDeadline)
+			if not self._timers: self._stopTicking()
+		for timer in due:
+			# Timers stopped by timers run earlier within this tick are skipped.
+			if timer._deadline is None: continue
+			if timer.interval is None: timer._deadline = None
+			try:
+				timer._func(*timer._args, **timer._kwargs)
+			except:
+				from logHandler import log
+				log.exception("SPL: error running timer %r"%timer)
+
+	# Move the clock forward (manual ticks only), running timers as they become due.
+	def advance(self, seconds):
+		if not self._manualTicks:
+			raise RuntimeError("Timer wheel is driven by a tick source")
+		target = self._clock() + seconds
+		while self._timers:
+			with self._lock:
+				nextDeadline = min(timer._deadline for slot in self._slots for timer in slot)
+			nextTime = self._origin + nextDeadline * self.resolution
+			if nextTime > target: break
+			self._setManualTime(nextTime)
+			self.tick()
+		self._setManualTime(target)
+		self.tick()
+
+	def _setManualTime(self, seconds):
+		clock = self._clock
+		if hasattr(clock, "set"): clock.set(seconds)
+		else:
+			raise RuntimeError("Clock cannot be moved forward")
+
+	def clear(self):
+		with self._lock:
+			for slot in self._slots:
+				for timer in slot: timer._deadline = None
+				del slot[:]
+			self._timers = 0
+			self._stopTicking()
+
+class ManualClock(object):
+	"""A clock that only moves when told to, for use with timer wheel and other schedulers.
+	"""
+
+	def __init__(self, seconds=0.0):
+		self.seconds = seconds
+
+	def __call__(self):
+		return self.seconds
+
+	def set(self, seconds):
+		self.seconds = seconds
+
+# The timer wheel used by the add-on.
+wheel = TimerWheel()
+
+def callLater(delay, func, *args, **kwargs):
+	return wheel.callLater(delay, func, *args, **kwargs)
+
+def callEvery(interval, func, *args, **kwargs):
+	return wheel.callEvery(interval, func, *args, **kwargs)
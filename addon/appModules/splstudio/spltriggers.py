@@ -0,0 +1,345 @@
+# SPL Studio time-based profile triggers
+# An app module and global plugin package for NVDA
+# Copyright 2018 Joseph Lee and others, released under GPL.
+# Provides scheduling services for time-based broadcast profiles.
+# For trigger timers and profile switching, see splconfig module.
+# This module must not depend on NVDA or wxPython so trigger schedules can be examined anywhere.
+
+import sys
+py3 = sys.version.startswith("3")
+import datetime
+import heapq
+import json
+
+# Python 3 preparation (a compatibility layer until Six module is included).
+rangeGen = range if py3 else xrange
+
+# Each trigger entry (profile triggers dictionary value) consists of seven fields organized as a list:
+# A bit vector specifying which days should this profile be active, the first five fields needed for constructing a datetime.datetime object used to look up when to trigger this profile, and an integer specifying the duration in minutes.
+
+# Current date and time as seen by trigger scheduling functions.
+# Can be replaced (such as by trigger replay harness) so schedules can be examined without waiting in real time.
+_clock = datetime.datetime.now
+
+def now():
+	return _clock()
+
+def setClock(clock=None):
+	global _clock
+	_clock = clock if clock is not None else datetime.datetime.now
+
+def triggerTime(entry):
+	return datetime.datetime(entry[1], entry[2], entry[3], entry[4], entry[5])
+
+# Check a trigger entry, returning a new list if valid.
+def validTriggerEntry(entry):
+	try:
+		bits, year, month, day, hour, minute, duration = [int(field) for field in entry]
+		datetime.datetime(year, month, day, hour, minute)
+	except (TypeError, ValueError):
+		return None
+	if not 0 < bits < 128 or not 0 <= duration <= 1440: return None
+	return [bits, year, month, day, hour, minute, duration]
+
+# Profile triggers are stored as a journal of trigger records following a version header, one JSON array per line (see splconfig.TriggerStore).
+triggerJournalVersion = 1
+
+# Replay journal lines (bytes), returning a (triggers, records applied, invalid records skipped) tuple.
+# Raises ValueError if the version header is missing or damaged, or if the journal comes from a newer add-on release.
+def readTriggerJournal(lines):
+	try:
+		version = json.loads(lines[0].decode("utf-8"))["version"]
+		if not isinstance(version, int): raise TypeError("Triggers journal version is not a number")
+	except (IndexError, KeyError, TypeError, ValueError):
+		raise ValueError("Triggers journal header is missing or damaged")
+	if version > triggerJournalVersion: raise ValueError("Triggers journal version %s is not supported"%version)
+	triggers = {}
+	records = invalid = 0
+	for line in lines[1:]:
+		# A record may be cut short if NVDA exited while saving triggers.
+		try:
+			record = json.loads(line.decode("utf-8"))
+			action, profile = record[0], record[1]
+			if not profile: raise ValueError("Trigger record without a profile")
+		except (IndexError, KeyError, TypeError, ValueError):
+			invalid += 1
+			continue
+		entry = validTriggerEntry(record[2:]) if action == "set" else None
+		if action == "del":
+			triggers.pop(profile, None)
+		elif entry is not None:
+			triggers[profile] = entry
+		else:
+			invalid += 1
+			continue
+		records += 1
+	return triggers, records, invalid
+
+# Load triggers from a triggers journal (.jsonl) or from a triggers pickle used by add-on 18.11 and earlier.
+def loadTriggers(path):
+	with open(path, "rb") as f:
+		if path.lower().endswith(".jsonl"):
+			return readTriggerJournal(f.read().splitlines())[0]
+		if py3: import pickle
+		else: import cPickle as pickle
+		return pickle.load(f)
+
+# Set the next timed profile.
+# Bits indicate the trigger days vector, hhmm is time, with the optional date being a specific date otherwise current date.
+def setNextTimedProfile(profile, bits, switchTime, date=None, duration=0):
+	if date is None: date = now()
+	dayIndex = date.weekday()
+	triggerCandidate = 64 >> dayIndex
+	currentTime = datetime.time(date.hour, date.minute, date.second, date.microsecond)
+	# Case 1: Show hasn't begun.
+	if (bits & triggerCandidate) and currentTime < switchTime:
+		delta = 0
+	else:
+		# Case 2: This is a weekly show.
+		if bits == triggerCandidate:
+			delta = 7
+		else:
+			import math
+			# Scan the bit vector until finding the correct date and calculate the resulting delta (dayIndex modulo 7).
+			# Take away the current trigger bit as this is invoked once the show air date has passed.
+			days = bits-triggerCandidate if bits & triggerCandidate else bits
+			currentDay = int(math.log(triggerCandidate, 2))
+			nextDay = int(math.log(days, 2))
+			# Hoping the resulting vector will have some bits set to 1...
+			if triggerCandidate > days:
+				delta = currentDay-nextDay
+			else:
+				triggerBit = -1
+				for bit in rangeGen(currentDay-1, -1, -1):
+					if 2 ** bit & days:
+						triggerBit = bit
+						break
+				if triggerBit > -1:
+					delta = currentDay-triggerBit
+				else:
+					delta = 7-(nextDay-currentDay)
+	date += datetime.timedelta(delta)
+	return [bits, date.year, date.month, date.day, switchTime.hour, switchTime.minute, duration]
+
+def totalSeconds(delta):
+	return delta.days * 86400 + delta.seconds + delta.microseconds / 1000000.0
+
+class TriggerScheduler(object):
+	"""Keeps the next trigger time for each time-based profile in a heap ordered by trigger time.
+	The triggers dictionary is shared with the caller, and trigger entries are advanced in place as shows go by.
+	When a profile's trigger changes, a new heap entry is pushed and the stale one is thrown away once it reaches the top, so updates cost O(log n).
+	"""
+
+	def __init__(self, triggers):
+		self.triggers = triggers
+		self.rebuild()
+
+	def rebuild(self):
+		self._scheduled = {}
+		self._heap = []
+		for profile, entry in self.triggers.items():
+			switchTime = triggerTime(entry)
+			self._scheduled[profile] = switchTime
+			self._heap.append((switchTime, profile))
+		heapq.heapify(self._heap)
+
+	def __len__(self):
+		return len(self._scheduled)
+
+	# Schedule the profile according to its current trigger entry.
+	def update(self, profile):
+		switchTime = triggerTime(self.triggers[profile])
+		self._scheduled[profile] = switchTime
+		heapq.heappush(self._heap, (switchTime, profile))
+
+	def remove(self, profile):
+		self._scheduled.pop(profile, None)
+
+	# Move the profile to its next air date/time after the given moment (or after the last trigger if this is a daily show).
+	def advance(self, profile, current):
+		entry = self.triggers[profile]
+		after = max(current, triggerTime(entry) + datetime.timedelta(minutes=1))
+		self.triggers[profile] = setNextTimedProfile(profile, entry[0], datetime.time(entry[4], entry[5]), date=after, duration=entry[6])
+		self.update(profile)
+
+	# Return the earliest (trigger time, profile) tuple, discarding stale heap entries along the way.
+	def peek(self):
+		heap = self._heap
+		while heap:
+			switchTime, profile = heap[0]
+			if self._scheduled.get(profile) == switchTime and profile in self.triggers:
+				return heap[0]
+			heapq.heappop(heap)
+		return None
+
+	# Locate the next time-based profile.
+	# A 4-tuple will be returned, containing the next trigger time (for time delta calculation), the profile name for this trigger time, whether an immediate switch is necessary, and if so, the duration delta (in seconds) for profiles with duration entry specified.
+	# Triggers that were missed altogether are moved to their next air date/time.
+	def next(self, current):
+		while True:
+			queued = self.peek()
+			if queued is None: return None
+			switchTime, profile = queued
+			# Hopefully the trigger should be ready before the show, but sometimes it isn't.
+			if current <= switchTime:
+				return (switchTime, profile, False, None)
+			# #52 (18.03/15.14-LTS): check the duration field first.
+			durationDelta = int(self.triggers[profile][6]*60 - totalSeconds(current-switchTime))
+			if durationDelta > 0:
+				# The show is more important.
+				return (switchTime, profile, True, durationDelta)
+			self.advance(profile, current)
+
+# Trigger windows are expressed in minutes since Monday midnight.
+_minutesPerDay = 1440
+_minutesPerWeek = _minutesPerDay * 7
+
+# Weekly windows (start and end minutes) for the given trigger, with windows going past the end of the week split in two.
+# Profiles without duration occupy one minute.
+def triggerWindows(bits, hour, minute, duration):
+	windows = []
+	for day in rangeGen(7):
+		if not bits & (64 >> day): continue
+		start = day * _minutesPerDay + hour * 60 + minute
+		end = start + max(duration, 1)
+		if end > _minutesPerWeek:
+			windows.append((start, _minutesPerWeek))
+			windows.append((0, end - _minutesPerWeek))
+		else: windows.append((start, end))
+	return windows
+
+class TriggerIntervalIndex(object):
+	"""A weekly interval tree of trigger windows (day, start time and duration) for all time-based profiles.
+	Windows are sorted by start minute, with the tree laid out implicitly over the sorted list and each subtree root remembering the latest end minute in its subtree.
+	Windows crossing midnight belong to the next day as well, and those crossing Sunday midnight continue on Monday.
+	"""
+
+	def __init__(self, triggers):
+		windows = []
+		for profile, entry in triggers.items():
+			for start, end in triggerWindows(entry[0], entry[4], entry[5], entry[6]):
+				windows.append((start, end, profile))
+		windows.sort()
+		self._windows = windows
+		self._maxEnd = [0] * len(windows)
+		if windows: self._build(0, len(windows))
+
+	def _build(self, lo, hi):
+		mid = (lo + hi) // 2
+		maxEnd = self._windows[mid][1]
+		if lo < mid: maxEnd = max(maxEnd, self._build(lo, mid))
+		if mid+1 < hi: maxEnd = max(maxEnd, self._build(mid+1, hi))
+		self._maxEnd[mid] = maxEnd
+		return maxEnd
+
+	# Return profiles whose windows overlap with the given window.
+	def _overlapping(self, start, end, found):
+		windows, maxEnd = self._windows, self._maxEnd
+		subtrees = [(0, len(windows))]
+		while subtrees:
+			lo, hi = subtrees.pop()
+			if lo >= hi: continue
+			mid = (lo + hi) // 2
+			# Nothing in this subtree ends after the window starts.
+			if maxEnd[mid] <= start: continue
+			subtrees.append((lo, mid))
+			# Windows to the right start even later.
+			if windows[mid][0] < end:
+				if windows[mid][1] > start: found.add(windows[mid][2])
+				subtrees.append((mid+1, hi))
+
+	# Find all profiles (other than the excluded one) whose trigger windows overlap with the given trigger.
+	def conflicts(self, bits, hour, minute, duration, exclude=None):
+		found = set()
+		for start, end in triggerWindows(bits, hour, minute, duration):
+			self._overlapping(start, end, found)
+		found.discard(exclude)
+		return sorted(found)
+
+# Trigger replay harness.
+# Runs time-based profiles through a simulated period, returning switch and end times.
+# Invoke it from NVDA Python console or run this module with a path to a profile triggers file (spltriggers.jsonl, or spltriggers.pickle from add-on 18.11 and earlier) to see a year's worth of switches and scheduler cost.
+# Note that the harness drives trigger scheduler directly and follows profile switch rules of its own (a profile without duration stays active until the next switch), not splconfig.triggerStart and related functions.
+# Therefore it checks scheduling, not timers, countdowns or profile switching as performed by the add-on.
+
+class SimulatedClock(object):
+	"""A clock for trigger functions, moved along by the replay harness.
+	"""
+
+	def __init__(self, current):
+		self.current = current
+
+	def __call__(self):
+		return self.current
+
+# Returns a list of (date and time, profile, event) tuples, with event being either "start" or "end".
+# Time-based profiles without duration stay active until the next profile switch (or the end of the replay).
+def replay(triggers, start=None, days=365):
+	triggers = dict((profile, list(entry)) for profile, entry in triggers.items())
+	if start is None: start = now()
+	finish = start + datetime.timedelta(days)
+	clock = SimulatedClock(start)
+	events = []
+	previousClock = _clock
+	setClock(clock)
+	try:
+		scheduler = TriggerScheduler(triggers)
+		activeProfile = None
+		while True:
+			queued = scheduler.next(clock.current)
+			if queued is None: break
+			switchTime, profile, switchNow, durationDelta = queued
+			if not switchNow:
+				if switchTime >= finish: break
+				clock.current = switchTime
+			# A profile without duration is still active, so return to the previous profile first.
+			if activeProfile is not None:
+				events.append((clock.current, activeProfile, "end"))
+				activeProfile = None
+			events.append((clock.current, profile, "start"))
+			duration = triggers[profile][6]
+			if not duration:
+				activeProfile = profile
+				scheduler.advance(profile, clock.current)
+				continue
+			showEnd = clock.current + datetime.timedelta(seconds=durationDelta if switchNow else duration*60)
+			if showEnd > finish:
+				events.append((finish, profile, "end"))
+				break
+			clock.current = showEnd
+			events.append((showEnd, profile, "end"))
+			scheduler.advance(profile, showEnd)
+		if activeProfile is not None: events.append((finish, activeProfile, "end"))
+	finally:
+		setClock(previousClock)
+	return events
+
+# Replay randomly generated schedules of various sizes, returning (number of triggers, number of switches, seconds taken) tuples.
+def benchmark(sizes=(10, 100, 1000), days=365, seed=0):
+	import random
+	import time
+	timer = time.perf_counter if py3 else time.clock
+	generator = random.Random(seed)
+	start = datetime.datetime(2018, 1, 1)
+	results = []
+	for size in sizes:
+		triggers = {}
+		for profile in rangeGen(size):
+			bits = generator.randint(1, 127)
+			switchTime = datetime.time(generator.randint(0, 23), generator.choice((0, 15, 30, 45)))
+			triggers["profile %s"%profile] = setNextTimedProfile(profile, bits, switchTime, date=start, duration=generator.choice((0, 30, 60, 120, 240)))
+		began = timer()
+		events = replay(triggers, start=start, days=days)
+		results.append((size, len([event for event in events if event[2] == "start"]), timer() - began))
+	return results
+
+def _main(args):
+	if args:
+		triggers = loadTriggers(args[0])
+		for moment, profile, event in replay(triggers):
+			print("%s %s %s"%(moment.strftime("%Y-%m-%d %H:%M"), event, profile))
+	for size, switches, seconds in benchmark():
+		print("%s triggers: %s switches in %.3f seconds (%.1f microseconds per switch)"%(size, switches, seconds, seconds * 1000000 / max(switches, 1)))
+
+if __name__ == "__main__":
+	_main(sys.argv[1:])
@@ -54,6 +54,7 @@ import ssl
 import gui
 import wx
 from . import splactions
+from . import spltimers
 
 # 18.09: choose default channel/update URL combination based on which channel is currently installed.
 SPLAddonManifest = addonHandler.Addon(os.path.join(os.path.dirname(__file__), "..", "..")).manifest
@@ -216,9 +217,9 @@ def startAutoUpdateCheck(interval=None):
 	if not splconfig.SPLConfig["Update"]["UpdateInterval"]: return
 	global _SPLUpdateT
 	if _SPLUpdateT is not None:
-		wx.CallAfter(_SPLUpdateT.Stop)
-	_SPLUpdateT = wx.PyTimer(autoUpdateCheck)
-	wx.CallAfter(_SPLUpdateT.Start, (_updateInterval if interval is None else interval) * 1000, True)
+		_SPLUpdateT.Stop()
+	# 18.12: managed by add-on timer wheel.
+	_SPLUpdateT = spltimers.callLater(_updateInterval if interval is None else interval, autoUpdateCheck)
 
 def checkForAddonUpdate():
 	# Add-on manifest routine (credit: various add-on authors including Noelia Martinez).
@@ -63,6 +63,7 @@ S: Stop with fade.
 T: Instant stop.
 C: Announce name and duration of the currently playing track.
 E: Announce if any encoders are being monitored.
+Shift+E: Show connection status summary for encoders monitored since NVDA started.
 I: Announce listener count.
 Q: Announce Studio status information.
 R: Remaining time for the playing track.
@@ -250,6 +251,12 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		encoders.announceNumMonitoringEncoders()
 		self.finish()
 
+	# 18.12: summarize encoder uptime, drops and reconnection times.
+	def script_encoderStatusSummary(self, gesture):
+		from . import encoders
+		encoders.announceEncoderStatusSummary()
+		self.finish()
+
 	def script_statusInfo(self, gesture):
 		# Go through below procedure, as custom commands can be assigned for this script.
 		SPLWin = user32.FindWindowW(u"SPLStudio", None)
@@ -334,6 +341,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		"kb:u":"pause",
 		"kb:r":"remainingTime",
 		"kb:e":"announceNumMonitoringEncoders",
+		"kb:shift+e":"encoderStatusSummary",
 		"kb:i":"listenerCount",
 		"kb:q":"statusInfo",
 		"kb:c":"currentTrackTitle",
@@ -5,6 +5,8 @@
 
 import threading
 import time
+import re
+import collections
 import api
 import ui
 import speech
@@ -16,6 +18,8 @@ import gui
 import wx
 import addonHandler
 addonHandler.initTranslation()
+# 18.12: encoder status state machine.
+from .encoderstatus import encoderStatusMachine, samStatusClassifier, splStatusClassifier
 
 # SPL Studio uses WM messages to send and receive data, similar to Winamp (see NVDA sources/appModules/winamp.py for more information).
 user32 = winUser.user32 # user32.dll.
@@ -26,44 +30,159 @@ SPLPlay = 12
 SPL_TrackPlaybackStatus = 104
 
 # Needed in Encoder support:
-SPLFocusToStudio = set() # Whether to focus to Studio or not.
-SPLPlayAfterConnecting = set()
-SPLBackgroundMonitor = set()
-SPLNoConnectionTone = set()
-
-# Customized for each encoder type.
-SAMStreamLabels= {} # A dictionary to store custom labels for each stream.
-SPLStreamLabels= {} # Same as above but optimized for SPL encoders (Studio 5.00 and later).
-SAMMonitorThreads = {}
-SPLMonitorThreads = {}
+# 18.12: encoder settings (stream label and flags) are kept in a settings model (see below), with each setting located by its position in an encoder settings record.
+SettingStreamLabel = 0
+SettingFocusToStudio = 1 # Whether to focus to Studio or not.
+SettingPlayAfterConnecting = 2
+SettingBackgroundMonitor = 3
+SettingNoConnectionTone = 4
+
 encoderMonCount = {"SAM":0, "SPL":0}
 
+class EncoderSettings(object):
+	"""Encoder settings for each encoder type, kept in a list of records ordered by encoder position (position 1 being the first record).
+	Each record consists of stream label (None if not labeled) followed by focus to Studio, play after connecting, background monitor and no connection tone flags.
+	Deleting an encoder removes its record, which moves settings for encoders after it up by one position.
+	Settings are read from and written to encoder settings file in the format used by earlier add-on releases (stream label sections and lists of encoder identifiers for each flag).
+	"""
+
+	encoderTypes = ("SAM", "SPL")
+	# Settings file keys for flags, in record order.
+	flagKeys = ("FocusToStudio", "PlayAfterConnecting", "BackgroundMonitor", "NoConnectionTone")
+
+	def __init__(self):
+		self.clear()
+
+	def clear(self):
+		self._records = dict((encoderType, []) for encoderType in self.encoderTypes)
+
+	@staticmethod
+	def _emptyRecord():
+		return [None, False, False, False, False]
+
+	def get(self, encoderType, pos, setting):
+		records = self._records[encoderType]
+		if 0 < pos <= len(records): return records[pos-1][setting]
+		return None if setting == SettingStreamLabel else False
+
+	def set(self, encoderType, pos, setting, value):
+		# Encoder positions start at 1.
+		if pos < 1: raise ValueError("Invalid encoder position %s"%pos)
+		records = self._records[encoderType]
+		if pos > len(records):
+			# Nothing to store.
+			if not value: return
+			records.extend(self._emptyRecord() for record in range(pos - len(records)))
+		records[pos-1][setting] = value
+		self._trim(records)
+
+	# Records at the end without any settings are not kept.
+	def _trim(self, records):
+		emptyRecord = self._emptyRecord()
+		while records and records[-1] == emptyRecord: records.pop()
+
+	# Returns whether there were settings for the encoder at the given position.
+	def remove(self, encoderType, pos):
+		records = self._records[encoderType]
+		if not 0 < pos <= len(records): return False
+		del records[pos-1]
+		self._trim(records)
+		return True
+
+	# Identifiers (such as "SAM 1") of encoders with the given flag set, in position order.
+	def encodersWithFlag(self, setting):
+		return [" ".join([encoderType, str(pos)]) for encoderType in self.encoderTypes for pos, record in enumerate(self._records[encoderType], 1) if record[setting]]
+
+	def clearFlag(self, setting):
+		for records in self._records.values():
+			for record in records: record[setting] = False
+			self._trim(records)
+
+	def load(self, config):
+		self.clear()
+		for encoderType in self.encoderTypes:
+			for pos, label in config.get(encoderType + "Encoders", {}).items():
+				try:
+					self.set(encoderType, int(pos), SettingStreamLabel, label or None)
+				except ValueError:
+					pass
+		for setting, flagKey in enumerate(self.flagKeys, 1):
+			encoders = config.get(flagKey, [])
+			# A flag set for just one encoder may have been saved without a trailing comma.
+			if not isinstance(encoders, list): encoders = [encoders]
+			for encoderId in encoders:
+				try:
+					encoderType, pos = encoderId.split()
+					self.set(encoderType, int(pos), setting, True)
+				except (ValueError, KeyError):
+					pass
+
+	# Store settings into the given settings file, leaving out empty sections and flag lists.
+	def save(self, config):
+		for encoderType in self.encoderTypes:
+			section = encoderType + "Encoders"
+			labels = dict((str(pos), record[SettingStreamLabel]) for pos, record in enumerate(self._records[encoderType], 1) if record[SettingStreamLabel])
+			if labels: config[section] = labels
+			elif section in config: del config[section]
+		for setting, flagKey in enumerate(self.flagKeys, 1):
+			encoders = self.encodersWithFlag(setting)
+			if encoders: config[flagKey] = encoders
+			elif flagKey in config: del config[flagKey]
+
+encoderSettings = EncoderSettings()
+
 # Configuration management.
 streamLabels = None
 
 # Load stream labels (and possibly other future goodies) from a file-based database.
 def loadStreamLabels():
-	global streamLabels, SAMStreamLabels, SPLStreamLabels, SPLFocusToStudio, SPLPlayAfterConnecting, SPLBackgroundMonitor, SPLNoConnectionTone
+	global streamLabels
 	import os, configobj, globalVars
 	streamLabels = configobj.ConfigObj(os.path.join(globalVars.appArgs.configPath, "splStreamLabels.ini"))
-	# Read stream labels.
+	# Read stream labels and other settings.
+	encoderSettings.load(streamLabels)
+
+# 18.12: encoder settings are saved shortly after the last change instead of after each change.
+# Settings are written to a temporary file first, which then replaces the settings file.
+_streamLabelsDirty = False
+_streamLabelsSaveTimer = None
+# Seconds to wait after the last change before saving encoder settings.
+streamLabelsSaveDelay = 2
+
+def saveStreamLabels():
+	global _streamLabelsDirty, _streamLabelsSaveTimer
+	_streamLabelsDirty = True
+	from appModules.splstudio import spltimers
+	if _streamLabelsSaveTimer is not None: _streamLabelsSaveTimer.Stop()
+	_streamLabelsSaveTimer = spltimers.callLater(streamLabelsSaveDelay, flushStreamLabels)
+
+def flushStreamLabels():
+	global _streamLabelsDirty, _streamLabelsSaveTimer
+	if _streamLabelsSaveTimer is not None:
+		_streamLabelsSaveTimer.Stop()
+		_streamLabelsSaveTimer = None
+	if not _streamLabelsDirty or streamLabels is None: return
+	import os
+	from appModules.splstudio.splbase import atomicWrite
+	encoderSettings.save(streamLabels)
+	# Without a file name, ConfigObj returns settings file lines instead of writing them.
+	path = streamLabels.filename
+	streamLabels.filename = None
 	try:
-		SAMStreamLabels = dict(streamLabels["SAMEncoders"])
-	except KeyError:
-		SAMStreamLabels = {}
+		lines = streamLabels.write()
+	finally:
+		streamLabels.filename = path
+	text = (streamLabels.newlines or os.linesep).join(lines) + (streamLabels.newlines or os.linesep)
+	if not isinstance(text, bytes): text = text.encode("utf-8")
 	try:
-		SPLStreamLabels = dict(streamLabels["SPLEncoders"])
-	except KeyError:
-		SPLStreamLabels = {}
-	# Read other settings.
-	if "FocusToStudio" in streamLabels:
-		SPLFocusToStudio = set(streamLabels["FocusToStudio"])
-	if "PlayAfterConnecting" in streamLabels:
-		SPLPlayAfterConnecting = set(streamLabels["PlayAfterConnecting"])
-	if "BackgroundMonitor" in streamLabels:
-		SPLBackgroundMonitor = set(streamLabels["BackgroundMonitor"])
-	if "ConnectionTone" in streamLabels:
-		SPLNoConnectionTone = set(streamLabels["NoConnectionTone"])
+		atomicWrite(path, text)
+	except (IOError, OSError):
+		# Such as when the config folder is read-only or full.
+		# Settings stay marked as changed so the next change (or the next flush) tries again, and the settings file is left alone.
+		from logHandler import log
+		log.debugWarning("SPL: cannot save encoder settings", exc_info=True)
+		return
+	_streamLabelsDirty = False
 
 # Report number of encoders being monitored.
 # 6.0: Refactor the below function to use the newer encoder config format.
@@ -71,68 +190,374 @@ def getStreamLabel(identifier):
 	encoderType, id = identifier.split()
 	# 5.2: Use a static map.
 	# 6.0: Look up the encoder type.
-	if encoderType == "SAM": labels = SAMStreamLabels
-	elif encoderType == "SPL": labels = SPLStreamLabels
-	if id in labels: return labels[id]
-	return None
+	# 18.12: look up encoder settings model.
+	return encoderSettings.get(encoderType, int(id), SettingStreamLabel)
 
 def announceNumMonitoringEncoders():
-	monitorCount = len(SPLBackgroundMonitor)
+	monitoredEncoders = encoderSettings.encodersWithFlag(SettingBackgroundMonitor)
+	monitorCount = len(monitoredEncoders)
 	if not monitorCount:
 		# Translators: Message presented when there are no encoders being monitored.
 		ui.message(_("No encoders are being monitored"))
 	else:
 		# Locate stream labels if any.
 		labels = []
-		for identifier in SPLBackgroundMonitor:
+		for identifier in monitoredEncoders:
 			label = getStreamLabel(identifier)
 			if label is None: labels.append(identifier)
 			else: labels.append("{encoderID} ({streamLabel})".format(encoderID = identifier, streamLabel=label))
 		# Translators: Announces number of encoders being monitored in the background.
 		ui.message(_("Number of encoders monitored: {numberOfEncoders}: {streamLabels}").format(numberOfEncoders = monitorCount, streamLabels=", ".join(labels)))
 
-# Remove encoder ID from various settings maps.
-# This is a private module level function in order for it to be invoked by humans alone.
-_encoderConfigRemoved = None
-def _removeEncoderID(encoderType, pos):
-	global _encoderConfigRemoved
-	# For now, store the key to map.
-	# This might become a module-level constant if other functions require this dictionary.
-	key2map = {"FocusToStudio":SPLFocusToStudio, "PlayAfterConnecting":SPLPlayAfterConnecting, "BackgroundMonitor":SPLBackgroundMonitor, "NoConnectionTone":SPLNoConnectionTone}
-	encoderID = " ".join([encoderType, pos])
-	# Go through each feature map, remove the encoder ID and manipulate encoder positions in these sets.
-	# For each set, have a list of set items handy, otherwise set cardinality error (RuntimeError) will occur if items are removed on the fly.
-	for key in key2map:
-		map = key2map[key]
-		if encoderID in map:
-			map.remove(encoderID)
-			_encoderConfigRemoved = True
-		# If not sorted, encoders will appear in random order (a downside of using sets, as their ordering is quite unpredictable).
-		currentEncoders = sorted([x for x in map if x.startswith(encoderType)])
-		if len(currentEncoders) and encoderID < currentEncoders[-1]:
-			# Same algorithm as stream label remover.
-			start = 0
-			if encoderID > currentEncoders[0]:
-				for candidate in currentEncoders:
-					if encoderID < candidate:
-						start = currentEncoders.index(candidate)
-			# Do set entry manipulations (remove first, then add).
-			for item in currentEncoders[start:]:
-				map.remove(item)
-				map.add(" ".join([encoderType, "%s"%(int(item.split()[-1])-1)]))
-		_encoderConfigRemoved = True
-		if len(map): streamLabels[key] = list(map)
+# 18.12: encoder monitor service.
+# One thread samples connection status of all encoders being monitored or connected, replacing a busy-polling thread per encoder.
+
+class EncoderMonitorState(object):
+	"""Status sampling state for an encoder, kept by the encoder monitor between samples.
+	"""
+
+	def __init__(self, encoder, connecting=False):
+		self.encoder = encoder
+		self.connecting = connecting
+		# Last status text seen and its state (see encoder status state machine below).
+		self.messageCache = ""
+		self.status = None
+		# Connection progress tones are played at set intervals while connecting.
+		self.lastTone = None
+		self.toneCount = 0
+		# 18.12: sampling interval (in seconds) and when the next sample is due, adjusted as status settles or changes.
+		self.interval = EncoderMonitor.fastInterval
+		self.nextSample = 0
+
+	# Returns True if connection progress tone should be played now.
+	def connectionToneDue(self, interval):
+		now = time.time()
+		if self.lastTone is None:
+			self.lastTone = now
+			return False
+		if now - self.lastTone < interval: return False
+		self.lastTone = now
+		self.toneCount += 1
+		return True
+
+	def resetConnectionTone(self):
+		self.lastTone = None
+		self.toneCount = 0
+
+class EncoderMonitor(object):
+	"""Samples connection status of registered encoders from a single thread.
+	Each encoder class samples its own status and reacts to status changes, returning whether it should still be monitored.
+	Encoders are sampled quickly while connecting, and less often the longer their status stays on air, idle or in error, with a status change bringing back quick sampling.
+	The monitor thread starts when the first encoder is registered and exits once no encoders are left or when the monitor is stopped.
+	"""
+
+	# Sampling intervals (in seconds): while connecting, and the slowest for encoders on air and idle or in error.
+	fastInterval = 0.05
+	onAirInterval = 1.0
+	idleInterval = 2.0
+	# How often connection progress tone is played (in seconds).
+	connectionToneInterval = 1.0
+
+	def __init__(self):
+		self._encoders = {}
+		self._lock = threading.Lock()
+		self._thread = None
+		# Lets the monitor thread know that an encoder was registered.
+		self._wake = threading.Event()
+		# Asks the monitor thread to exit after the current sample.
+		# Each monitor thread gets its own stop event so a thread still finishing its last sample cannot be brought back by a new registration.
+		self._stop = None
+
+	def register(self, encoder, connecting=False):
+		with self._lock:
+			state = self._encoders.get(encoder.encoderId)
+			if state is not None:
+				state.encoder = encoder
+				if connecting:
+					state.connecting = True
+					state.interval = self.fastInterval
+					state.nextSample = 0
+					self._wake.set()
+				return
+			self._encoders[encoder.encoderId] = EncoderMonitorState(encoder, connecting=connecting)
+			self._wake.set()
+			if self._thread is None:
+				self._stop = threading.Event()
+				self._thread = threading.Thread(target=self._run, name="SPLEncoderMonitor", args=(self._stop,))
+				self._thread.daemon = True
+				self._thread.start()
+
+	def unregister(self, encoderId):
+		with self._lock:
+			if self._encoders.pop(encoderId, None) is not None:
+				encoderHistory(encoderId).recordStatus(None)
+
+	def isMonitoring(self, encoderId):
+		return encoderId in self._encoders
+
+	# Current sampling interval for the encoder (in seconds), or None if it is not monitored.
+	def sampleInterval(self, encoderId):
+		state = self._encoders.get(encoderId)
+		return state.interval if state is not None else None
+
+	def _adjustInterval(self, state, previousStatus):
+		if state.status != previousStatus or state.connecting or state.status == "connecting":
+			state.interval = self.fastInterval
 		else:
-			try:
-				del streamLabels[key]
-			except KeyError:
-				pass
+			state.interval = min(state.interval * 2, self.onAirInterval if state.status == "onAir" else self.idleInterval)
+
+	# Snapshot of encoders being monitored as (encoder identifier, status, sampling interval, connecting) tuples.
+	def monitors(self):
+		with self._lock:
+			return [(encoderId, state.status, state.interval, state.connecting) for encoderId, state in sorted(self._encoders.items())]
+
+	@property
+	def running(self):
+		thread = self._thread
+		return thread is not None and thread.is_alive()
+
+	def clear(self):
+		with self._lock:
+			for encoderId in self._encoders:
+				encoderHistory(encoderId).recordStatus(None)
+			self._encoders.clear()
+
+	# Unregister all encoders and wait for the monitor thread to exit (up to timeout seconds).
+	def stop(self, timeout=1.0):
+		self.clear()
+		with self._lock:
+			thread = self._thread
+			if thread is None: return
+			self._stop.set()
+			self._thread = None
+			self._wake.set()
+		if thread is not threading.current_thread():
+			thread.join(timeout)
+			if thread.is_alive():
+				from logHandler import log
+				log.debugWarning("SPL: encoder monitor thread did not exit in time")
+
+	def _run(self, stop):
+		while True:
+			with self._lock:
+				states = list(self._encoders.items())
+				if not states or stop.is_set():
+					if not stop.is_set(): self._thread = None
+					return
+				self._wake.clear()
+			now = time.time()
+			for encoderId, state in states:
+				if stop.is_set(): break
+				if state.nextSample > now: continue
+				previousStatus = state.status
+				try:
+					keepMonitoring = state.encoder.sampleConnectionStatus(state)
+					self._adjustInterval(state, previousStatus)
+				except:
+					from logHandler import log
+					log.debugWarning("SPL: cannot sample status for encoder %s"%encoderId, exc_info=True)
+					keepMonitoring = False
+				state.nextSample = time.time() + state.interval
+				if not keepMonitoring:
+					with self._lock:
+						# The encoder may have been registered again in the meantime.
+						if self._encoders.get(encoderId) is state:
+							del self._encoders[encoderId]
+							encoderHistory(encoderId).recordStatus(None)
+			# Wait until the next sample is due or another encoder is registered.
+			with self._lock:
+				nextSample = min([state.nextSample for state in self._encoders.values()] or [0])
+			self._wake.wait(max(nextSample - time.time(), 0.001))
+
+encoderMonitor = EncoderMonitor()
+
+# 18.12: list encoders being checked by encoder monitor, useful when diagnosing encoder monitoring problems.
+def announceEncoderMonitors():
+	monitors = encoderMonitor.monitors()
+	if not monitors or not encoderMonitor.running:
+		# Translators: Presented when encoder monitor is not checking any encoder.
+		ui.message(_("Encoder monitor is not running"))
+		return
+	# Translators: Encoder states presented when listing encoders being checked by encoder monitor.
+	statusLabels = {"connecting": _("connecting"), "onAir": _("on air"), "idle": _("idle"), "error": _("error")}
+	entries = []
+	for encoderId, status, interval, connecting in monitors:
+		# Translators: Presented when listing encoders being checked by encoder monitor (example: SPL 1: on air, every 1000 milliseconds).
+		entries.append(_("{encoder}: {status}, every {interval} milliseconds").format(encoder = encoderId, status = statusLabels.get(status, _("unknown")) if not connecting else statusLabels["connecting"], interval = int(interval*1000)))
+	# Translators: Presented when listing encoders being checked by encoder monitor.
+	ui.message(_("Encoder monitor checking {count} encoders: {encoders}").format(count = len(monitors), encoders = "; ".join(entries)))
+
+# 18.12: encoder dashboard.
+# Position, stream label, status and transfer rate of all encoders are presented in a table, with encoder rows read in one pass through the encoder list.
+
+def _escapeHTML(text):
+	from xml.sax.saxutils import escape
+	return escape(text)
+
+# Show a table of (position, title, status, transfer rate) rows coming from encoder rows method of an encoder.
+def showEncoderDashboard(encoderType, rows):
+	# Translators: Column headers in encoder dashboard.
+	headers = [_("Position"), _("Encoder"), _("Stream label"), _("Status"), _("Transfer rate")]
+	dashboard = ["<table><tr><th>{headers}</tr>".format(headers = "<th>".join(headers))]
+	for pos, title, status, transferRate in rows:
+		# Stream labels come from encoder settings rather than the encoder window.
+		streamLabel = encoderSettings.get(encoderType, pos, SettingStreamLabel) or ""
+		contents = [str(pos), title or "", streamLabel, status or "", "{0:g} kbps".format(transferRate) if transferRate is not None else ""]
+		dashboard.append("<tr><td>{contents}</tr>".format(contents = "<td>".join(_escapeHTML(content) for content in contents)))
+	dashboard.append("</table>")
+	# Translators: Title of encoder dashboard window.
+	ui.browseableMessage("".join(dashboard), title=_("Encoder dashboard"), isHtml=True)
+
+# Read the given columns of all rows in a SysListView32 list, reusing one item record and one text buffer in the list's process instead of allocating them for each cell.
+def _listViewRows(item, columns):
+	import ctypes
+	import winKernel
+	import watchdog
+	processHandle = item.processHandle
+	windowHandle = item.windowHandle
+	LVITEM = item.LVITEM
+	textLength = sysListView32.CBEMAXSTRLEN
+	rowCount = watchdog.cancellableSendMessage(windowHandle, sysListView32.LVM_GETITEMCOUNT, 0, 0)
+	rows = []
+	internalItem = winKernel.virtualAllocEx(processHandle, None, ctypes.sizeof(LVITEM), winKernel.MEM_COMMIT, winKernel.PAGE_READWRITE)
+	try:
+		internalText = winKernel.virtualAllocEx(processHandle, None, textLength*2, winKernel.MEM_COMMIT, winKernel.PAGE_READWRITE)
+		try:
+			buffer = ctypes.create_unicode_buffer(textLength)
+			for row in range(rowCount):
+				contents = []
+				for column in columns:
+					lvItem = LVITEM(iItem=row, mask=sysListView32.LVIF_TEXT|sysListView32.LVIF_COLUMNS, iSubItem=column, pszText=internalText, cchTextMax=textLength)
+					winKernel.writeProcessMemory(processHandle, internalItem, ctypes.byref(lvItem), ctypes.sizeof(LVITEM), None)
+					length = watchdog.cancellableSendMessage(windowHandle, sysListView32.LVM_GETITEMTEXTW, row, internalItem)
+					if length:
+						winKernel.readProcessMemory(processHandle, internalText, buffer, min(length+1, textLength)*2, None)
+						contents.append(buffer.value)
+					else: contents.append(None)
+				rows.append(contents)
+		finally:
+			winKernel.virtualFreeEx(processHandle, internalText, 0, winKernel.MEM_RELEASE)
+	finally:
+		winKernel.virtualFreeEx(processHandle, internalItem, 0, winKernel.MEM_RELEASE)
+	return rows
+
+# 18.12: encoder status history.
+# Status transitions and transfer rates seen by encoder monitor are kept for each encoder so connection reliability can be reviewed.
+
+class EncoderStatusHistory(object):
+	"""Connection status history for an encoder.
+	Recent status transitions and transfer rate samples are kept in fixed-size ring buffers, and running totals (time on air, drops and reconnection time) cover the whole time the encoder was monitored.
+	A status of None means the encoder is no longer monitored, and time spent unmonitored is not counted.
+	"""
+
+	transitionsSize = 256
+	transferRatesSize = 600
+
+	def __init__(self):
+		# (time, status) and (time, transfer rate in kbps) tuples.
+		self.transitions = collections.deque(maxlen=self.transitionsSize)
+		self.transferRates = collections.deque(maxlen=self.transferRatesSize)
+		self.status = None
+		self.since = None
+		self.monitoredTime = 0.0
+		self.onAirTime = 0.0
+		self.drops = 0
+		self.reconnects = 0
+		self.reconnectTime = 0.0
+		self._droppedAt = None
+
+	def recordStatus(self, status, now=None):
+		if status == self.status: return
+		if now is None: now = time.time()
+		if self.status is not None:
+			elapsed = now - self.since
+			self.monitoredTime += elapsed
+			if self.status == "onAir":
+				self.onAirTime += elapsed
+				# Encoder was no longer on air while being monitored.
+				if status is not None:
+					self.drops += 1
+					self._droppedAt = now
+		if status == "onAir" and self._droppedAt is not None:
+			self.reconnects += 1
+			self.reconnectTime += now - self._droppedAt
+			self._droppedAt = None
+		self.transitions.append((now, status))
+		self.status = status
+		self.since = now
+
+	def recordTransferRate(self, transferRate, now=None):
+		self.transferRates.append((now if now is not None else time.time(), transferRate))
+
+	# Percentage of monitored time spent on air, or None if the encoder was never monitored.
+	def uptime(self, now=None):
+		if now is None: now = time.time()
+		monitoredTime, onAirTime = self.monitoredTime, self.onAirTime
+		if self.status is not None:
+			monitoredTime += now - self.since
+			if self.status == "onAir": onAirTime += now - self.since
+		if not monitoredTime: return None
+		return onAirTime * 100.0 / monitoredTime
+
+	# Mean seconds taken to get back on air after a drop, or None if there were no reconnections.
+	def meanReconnectTime(self):
+		return self.reconnectTime / self.reconnects if self.reconnects else None
+
+	# Mean of recent transfer rate samples, or None if there are none.
+	def meanTransferRate(self):
+		if not self.transferRates: return None
+		return sum(transferRate for sampled, transferRate in self.transferRates) / float(len(self.transferRates))
+
+# Encoder status histories since NVDA started, keyed by encoder identifier.
+encoderHistories = {}
+
+def encoderHistory(encoderId):
+	history = encoderHistories.get(encoderId)
+	if history is None:
+		history = encoderHistories.setdefault(encoderId, EncoderStatusHistory())
+	return history
+
+# Summarize connection reliability for each encoder monitored since NVDA started.
+def encoderStatusSummary():
+	now = time.time()
+	summary = []
+	for encoderId in sorted(encoderHistories):
+		history = encoderHistories[encoderId]
+		uptime = history.uptime(now=now)
+		if uptime is None: continue
+		label = getStreamLabel(encoderId) if streamLabels is not None else None
+		name = "{encoderID} ({streamLabel})".format(encoderID = encoderId, streamLabel=label) if label else encoderId
+		# Translators: Presented as part of encoder status summary (example: SPL 1 (Main stream): on air 98.5% of the time, 2 drops).
+		line = _("{encoder}: on air {uptime:.1f}% of the time, {drops} drops").format(encoder = name, uptime = uptime, drops = history.drops)
+		meanReconnectTime = history.meanReconnectTime()
+		if meanReconnectTime is not None:
+			# Translators: Presented as part of encoder status summary.
+			line += _(", mean reconnect time {seconds:.1f} seconds").format(seconds = meanReconnectTime)
+		meanTransferRate = history.meanTransferRate()
+		if meanTransferRate is not None:
+			# Translators: Presented as part of encoder status summary.
+			line += _(", average transfer rate {transferRate:.0f} kbps").format(transferRate = meanTransferRate)
+		summary.append(line)
+	return summary
+
+def announceEncoderStatusSummary():
+	summary = encoderStatusSummary()
+	if not summary:
+		# Translators: Message presented when no encoders were monitored.
+		ui.message(_("No encoder status history"))
+		return
+	# Translators: Title of encoder status summary window.
+	ui.browseableMessage("\n".join(summary), title=_("Encoder status summary"))
 
 # Nullify various flag sets, otherwise memory leak occurs.
 def cleanup():
-	global streamLabels, SAMStreamLabels, SPLStreamLabels, SPLFocusToStudio, SPLPlayAfterConnecting, SPLBackgroundMonitor, SPLNoConnectionTone, encoderMonCount, SAMMonitorThreads, SPLMonitorThreads
-	for map in [streamLabels, SAMStreamLabels, SPLStreamLabels, SPLFocusToStudio, SPLPlayAfterConnecting, SPLBackgroundMonitor, SPLNoConnectionTone, SAMMonitorThreads, SPLMonitorThreads]:
-		if map is not None: map.clear()
+	global streamLabels, encoderMonCount
+	# 18.12: save pending changes to encoder settings.
+	flushStreamLabels()
+	if streamLabels is not None: streamLabels.clear()
+	encoderSettings.clear()
+	# 18.12: encoders are no longer monitored, and encoder monitor thread is stopped.
+	encoderMonitor.stop()
 	# Nullify stream labels.
 	streamLabels = None
 	# Without resetting monitor count, we end up with higher and higher value for this.
@@ -185,16 +610,26 @@ class EncoderConfigDialog(wx.Dialog):
 
 		# Translators: A checkbox in encoder settings to set if NvDA should switch focus to Studio window when connected.
 		self.focusToStudio = encoderConfigHelper.addItem(wx.CheckBox(self, label=_("&Focus to Studio when connected")))
-		self.focusToStudio.SetValue(obj.encoderId in SPLFocusToStudio)
+		self.focusToStudio.SetValue(obj.focusToStudio)
 		# Translators: A checkbox in encoder settings to set if NvDA should play the next track when connected.
 		self.playAfterConnecting = encoderConfigHelper.addItem(wx.CheckBox(self, label=_("&Play first track when connected")))
-		self.playAfterConnecting.SetValue(obj.encoderId in SPLPlayAfterConnecting)
+		self.playAfterConnecting.SetValue(obj.playAfterConnecting)
 		# Translators: A checkbox in encoder settings to set if NvDA should monitor the status of this encoder in the background.
 		self.backgroundMonitor = encoderConfigHelper.addItem(wx.CheckBox(self, label=_("Enable background connection &monitoring")))
-		self.backgroundMonitor.SetValue(obj.encoderId in SPLBackgroundMonitor)
+		self.backgroundMonitor.SetValue(obj.backgroundMonitor)
 		# Translators: A checkbox in encoder settings to set if NvDA should play connection progress tone.
 		self.noConnectionTone = encoderConfigHelper.addItem(wx.CheckBox(self, label=_("Play connection status &beep while connecting")))
-		self.noConnectionTone.SetValue(obj.encoderId not in SPLNoConnectionTone)
+		self.noConnectionTone.SetValue(obj.connectionTone)
+
+		# 18.12: show how often status of this encoder is checked.
+		sampleInterval = encoderMonitor.sampleInterval(obj.encoderId)
+		if sampleInterval is not None:
+			# Translators: Shown in encoder settings to indicate how often encoder status is checked (example: Status checked every 50 milliseconds).
+			sampleIntervalText = _("Status checked every {interval} milliseconds").format(interval = int(sampleInterval*1000))
+		else:
+			# Translators: Shown in encoder settings if the encoder is not being monitored.
+			sampleIntervalText = _("Status is not being checked")
+		encoderConfigHelper.addItem(wx.StaticText(self, label=sampleIntervalText))
 
 		encoderConfigHelper.addDialogDismissButtons(self.CreateButtonSizer(wx.OK | wx.CANCEL))
 		self.Bind(wx.EVT_BUTTON,self.onOk,id=wx.ID_OK)
@@ -206,16 +641,18 @@ class EncoderConfigDialog(wx.Dialog):
 		self.streamLabel.SetFocus()
 
 	def onOk(self, evt):
-		self.obj._setFlags(self.obj.encoderId, self.focusToStudio.Value, SPLFocusToStudio, "FocusToStudio", save=False)
-		self.obj._setFlags(self.obj.encoderId, self.playAfterConnecting.Value, SPLPlayAfterConnecting, "PlayAfterConnecting", save=False)
-		self.obj._setFlags(self.obj.encoderId, self.backgroundMonitor.Value, SPLBackgroundMonitor, "BackgroundMonitor", save=False)
+		self.obj._setFlags(SettingFocusToStudio, self.focusToStudio.Value, save=False)
+		self.obj._setFlags(SettingPlayAfterConnecting, self.playAfterConnecting.Value, save=False)
+		self.obj._setFlags(SettingBackgroundMonitor, self.backgroundMonitor.Value, save=False)
 		# Invert the following only.
-		self.obj._setFlags(self.obj.encoderId, not self.noConnectionTone.Value, SPLNoConnectionTone, "NoConnectionTone", save=False)
+		self.obj._setFlags(SettingNoConnectionTone, not self.noConnectionTone.Value, save=False)
 		newStreamLabel = self.streamLabel.Value
 		if newStreamLabel is None: newStreamLabel = ""
 		if newStreamLabel == self.curStreamLabel:
-			streamLabels.write() # Only flag(s) have changed.
+			saveStreamLabels() # Only flag(s) have changed.
 		else: self.obj.setStreamLabel(newStreamLabel)
+		# 18.12: settings are saved when this dialog closes.
+		flushStreamLabels()
 		self.Destroy()
 
 	def onCancel(self, evt):
@@ -229,8 +666,8 @@ class Encoder(IAccessible):
 	"""Represents an encoder from within StationPlaylist Studio or Streamer.
 	This base encoder provides scripts for all encoders such as stream labeler and toggling focusing to Studio when connected.
 	Subclasses must provide scripts to handle encoder connection and connection announcement routines.
-	In addition, they must implement the required actions to set options such as focusing to Studio, storing stream labels and so on, as each subclass relies on a feature map.
-	For example, for SAM encoder class, the feature map is SAM* where * denotes the feature in question.
+	In addition, they must provide the encoder title used in stream labeler and encoder settings dialogs.
+	Options such as focusing to Studio and stream labels are kept in encoder settings model, looked up by encoder type and position.
 	Lastly, each encoder class must provide a unique identifying string to identify the type of the encoder (e.g. SAM for SAM encoder).
 	"""
 
@@ -245,31 +682,33 @@ class Encoder(IAccessible):
 
 	@property
 	def focusToStudio(self):
-		try:
-			return self.encoderId in SPLFocusToStudio
-		except KeyError:
-			return False
+		return encoderSettings.get(self.encoderType, self.IAccessibleChildID, SettingFocusToStudio)
 
 	@property
 	def playAfterConnecting(self):
-		try:
-			return self.encoderId in SPLPlayAfterConnecting
-		except KeyError:
-			return False
+		return encoderSettings.get(self.encoderType, self.IAccessibleChildID, SettingPlayAfterConnecting)
 
 	@property
 	def backgroundMonitor(self):
-		try:
-			return self.encoderId in SPLBackgroundMonitor
-		except KeyError:
-			return False
+		return encoderSettings.get(self.encoderType, self.IAccessibleChildID, SettingBackgroundMonitor)
 
 	@property
 	def connectionTone(self):
-		try:
-			return self.encoderId not in SPLNoConnectionTone
-		except KeyError:
-			return True
+		return not encoderSettings.get(self.encoderType, self.IAccessibleChildID, SettingNoConnectionTone)
+
+	# Title used in stream labeler and encoder settings dialogs.
+	@property
+	def encoderTitle(self):
+		raise NotImplementedError
+
+	# Return stream label for this encoder (None if not labeled), along with encoder title if asked.
+	def getStreamLabel(self, getTitle=False):
+		streamLabel = encoderSettings.get(self.encoderType, self.IAccessibleChildID, SettingStreamLabel)
+		return (streamLabel, self.encoderTitle) if getTitle else streamLabel
+
+	def setStreamLabel(self, newStreamLabel):
+		encoderSettings.set(self.encoderType, self.IAccessibleChildID, SettingStreamLabel, newStreamLabel or None)
+		saveStreamLabels()
 
 	# Format the status message to prepare for monitoring multiple encoders.
 	def encoderStatusMessage(self, message, id):
@@ -284,30 +723,84 @@ class Encoder(IAccessible):
 		except:
 			pass
 
-	# Encoder connection reporter thread.
+	# Encoder connection reporter.
+	# 18.12: handled by encoder monitor service.
 	def connectStart(self, connecting=False):
-		statusThread = threading.Thread(target=self.reportConnectionStatus, kwargs=dict(connecting=connecting))
-		statusThread.start()
-		self.threadPool[self.IAccessibleChildID] = statusThread
+		encoderMonitor.register(self, connecting=connecting)
+
+	# Return current connection status text, or None if the encoder is gone.
+	def connectionStatus(self):
+		raise NotImplementedError
+
+	# Return transfer rate (in kbps) shown in the given status text, or None if the encoder does not show it.
+	def transferRate(self, status):
+		return None
+
+	# Sample connection status, reacting to status changes.
+	# Returns whether the encoder should still be monitored.
+	# 18.12: status changes are handled by encoder status state machine, with each encoder type providing a status classifier.
+	def sampleConnectionStatus(self, state):
+		status = self.connectionStatus()
+		if status is None: return False
+		previous = state.status
+		state.status = self.statusClassifier.classify(status)
+		# 18.12: record status transitions and transfer rates.
+		history = encoderHistory(self.encoderId)
+		if state.status != previous: history.recordStatus(state.status)
+		if state.status == "onAir":
+			transferRate = self.transferRate(status)
+			if transferRate is not None: history.recordTransferRate(transferRate)
+		# Status text is announced as it changes, except for on air status (such as transfer rate) which is announced once.
+		if status != state.messageCache:
+			state.messageCache = status
+			if state.status != "onAir":
+				self.encoderStatusMessage(status, self.IAccessibleChildID)
+		for action in encoderStatusMachine.actions(previous, state.status):
+			getattr(self, "statusAction_" + action)(state)
+		return state.connecting or self.backgroundMonitor
+
+	# Encoder status actions.
+
+	def statusAction_resetConnectionTone(self, state):
+		state.resetConnectionTone()
+
+	def statusAction_stopConnecting(self, state):
+		state.connecting = False
+		state.resetConnectionTone()
+
+	def statusAction_connectionTone(self, state):
+		if state.connectionToneDue(encoderMonitor.connectionToneInterval) and self.connectionTone:
+			tones.beep(500, 50)
+
+	def statusAction_onAirTone(self, state):
+		tones.beep(1000, 150)
+
+	def statusAction_idleTone(self, state):
+		tones.beep(250, 250)
+
+	def statusAction_announce(self, state):
+		self.encoderStatusMessage(state.messageCache, self.IAccessibleChildID)
+
+	def statusAction_focusToStudio(self, state):
+		if self.focusToStudio:
+			user32.SetForegroundWindow(user32.FindWindowW(u"TStudioForm", None))
+
+	def statusAction_playAfterConnecting(self, state):
+		# #37 (17.08.1): if run from another function, the message will not be sent, so must be done here.
+		if self.playAfterConnecting:
+			# Do not interupt the currently playing track.
+			SPLWin = user32.FindWindowW(u"SPLStudio", None)
+			if winUser.sendMessage(SPLWin, 1024, 0, SPL_TrackPlaybackStatus) == 0:
+				winUser.sendMessage(SPLWin, 1024, 0, SPLPlay)
 
 	# A master flag setter.
-	# Set or clear a given flag for the encoder given its ID, flag and flag container (currently a feature set).
-	# Also take in the flag key for storing it into the settings file.
+	# Set or clear a given flag (encoder setting) for this encoder.
 	# The flag will then be written to the configuration file.
 	# 7.0: Don't dump flags to disk unless told.
-	def _setFlags(self, encoderId, flag, flagMap, flagKey, save=True):
-		if flag and not encoderId in flagMap:
-			flagMap.add(encoderId)
-		elif not flag and encoderId in flagMap:
-			flagMap.remove(encoderId)
-		# No need to store an empty flag map.
-		if len(flagMap): streamLabels[flagKey] = list(flagMap)
-		else:
-			try:
-				del streamLabels[flagKey]
-			except KeyError:
-				pass
-		if save: streamLabels.write()
+	# 18.12: flags are saved shortly after the last change, and are kept in encoder settings model.
+	def _setFlags(self, setting, flag, save=True):
+		encoderSettings.set(self.encoderType, self.IAccessibleChildID, setting, flag)
+		if save: saveStreamLabels()
 
 	# Now the flag configuration scripts.
 
@@ -318,7 +811,7 @@ class Encoder(IAccessible):
 		else:
 			# Translators: Presented when toggling the setting to switch to Studio when connected to a streaming server.
 			ui.message(_("Do not switch to Studio after connecting"))
-		self._setFlags(self.encoderId, not self.focusToStudio, SPLFocusToStudio, "FocusToStudio")
+		self._setFlags(SettingFocusToStudio, not self.focusToStudio)
 	# Translators: Input help mode message in SAM Encoder window.
 	script_toggleFocusToStudio.__doc__=_("Toggles whether NVDA will switch to Studio when connected to a streaming server.")
 
@@ -329,7 +822,7 @@ class Encoder(IAccessible):
 		else:
 			# Translators: Presented when toggling the setting to switch to Studio when connected to a streaming server.
 			ui.message(_("Do not play first track after connecting"))
-		self._setFlags(self.encoderId, not self.playAfterConnecting, SPLPlayAfterConnecting, "PlayAfterConnecting")
+		self._setFlags(SettingPlayAfterConnecting, not self.playAfterConnecting)
 	# Translators: Input help mode message in SAM Encoder window.
 	script_togglePlay.__doc__=_("Toggles whether Studio will play the first song when connected to a streaming server.")
 
@@ -343,17 +836,14 @@ class Encoder(IAccessible):
 				encoderMonCount[self.encoderType] -= 1
 				# Translators: Presented when toggling the setting to monitor the selected encoder.
 				ui.message(_("Encoder {encoderNumber} will not be monitored").format(encoderNumber = self.IAccessibleChildID))
-			self._setFlags(self.encoderId, not self.backgroundMonitor, SPLBackgroundMonitor, "BackgroundMonitor")
-			if self.backgroundMonitor:
-				try:
-					monitoring = self.threadPool[self.IAccessibleChildID].isAlive()
-				except KeyError:
-					monitoring = False
-				if not monitoring: self.connectStart()
+			self._setFlags(SettingBackgroundMonitor, not self.backgroundMonitor)
+			if self.backgroundMonitor and not encoderMonitor.isMonitoring(self.encoderId):
+				self.connectStart()
 		else:
 			for encoderType in encoderMonCount:
 				encoderMonCount[encoderType] = 0
-			SPLBackgroundMonitor.clear()
+			encoderSettings.clearFlag(SettingBackgroundMonitor)
+			saveStreamLabels()
 			# Translators: Announced when background encoder monitoring is canceled.
 			ui.message(_("Encoder monitoring canceled"))
 	# Translators: Input help mode message in SAM Encoder window.
@@ -379,45 +869,9 @@ class Encoder(IAccessible):
 	script_streamLabeler.__doc__=_("Opens a dialog to label the selected encoder.")
 
 	def removeStreamConfig(self, pos):
-		# An application of map successor algorithm.
-		global _encoderConfigRemoved
-		_removeEncoderID(self.encoderType, pos)
-		streamLabelsMap = self.streamLabelsMap
-		labelLength = len(streamLabelsMap)
-		if not labelLength or pos > max(streamLabelsMap.keys()):
-			if _encoderConfigRemoved is not None:
-				streamLabels.write()
-				_encoderConfigRemoved = None
-			return
-		elif labelLength  == 1:
-			if not pos in streamLabelsMap:
-				pos = list(streamLabelsMap.keys())[0]
-				oldPosition = int(pos)
-				streamLabelsMap[str(oldPosition-1)] = streamLabelsMap[pos]
-			del streamLabelsMap[pos]
-		else:
-			encoderPositions = sorted(streamLabelsMap.keys())
-			# What if the position happens to be the last stream label position?
-			if pos == max(encoderPositions): del streamLabelsMap[pos]
-			else:
-				# Find the exact or closest successor.
-				startPosition = 0
-				if pos == min(encoderPositions):
-					del streamLabelsMap[pos]
-					startPosition = 1
-				elif pos > min(encoderPositions):
-					for candidate in encoderPositions:
-						if candidate >= pos:
-							startPositionCandidate = encoderPositions.index(candidate)
-							startPosition = startPositionCandidate+1 if candidate == pos else startPositionCandidate
-							break
-				# Now move them forward.
-				for position in encoderPositions[startPosition:]:
-					oldPosition = int(position)
-					streamLabelsMap[str(oldPosition-1)] = streamLabelsMap[position]
-					del streamLabelsMap[position]
-		streamLabels[self.encoderType + "Encoders"] = streamLabelsMap
-		streamLabels.write()
+		# 18.12: settings for encoders after the deleted one move up by one position.
+		if encoderSettings.remove(self.encoderType, int(pos)):
+			saveStreamLabels()
 
 	def script_streamLabelEraser(self, gesture):
 		# Unfortunately, py3 flag must be checked here.
@@ -469,9 +923,35 @@ class Encoder(IAccessible):
 	def script_announceEncoderPosition(self, gesture):
 		ui.message(_("Position: {pos}").format(pos = self.IAccessibleChildID))
 
+	# 18.12: encoder dashboard.
+	# Return (position, title, status, transfer rate) for all encoders in the encoder list.
+	def encoderRows(self):
+		raise NotImplementedError
+
+	def script_encoderDashboard(self, gesture):
+		try:
+			rows = self.encoderRows()
+		except:
+			from logHandler import log
+			log.debugWarning("SPL: cannot read encoder list", exc_info=True)
+			rows = None
+		if not rows:
+			# Translators: Presented when encoder dashboard cannot be shown.
+			ui.message(_("Cannot read encoder list"))
+			return
+		showEncoderDashboard(self.encoderType, rows)
+	# Translators: Input help mode message in SAM Encoder window.
+	script_encoderDashboard.__doc__=_("Shows position, stream label, status and transfer rate of all encoders in a table.")
+
+	# 18.12: encoders being checked by encoder monitor.
+	def script_announceEncoderMonitors(self, gesture):
+		announceEncoderMonitors()
+	# Translators: Input help mode message in SAM Encoder window.
+	script_announceEncoderMonitors.__doc__=_("Announces encoders whose connection status is being checked, along with their status and how often it is checked.")
+
 	def script_announceEncoderLabel(self, gesture):
 		try:
-			streamLabel = self.getStreamLabel()[0]
+			streamLabel = self.getStreamLabel()
 		except TypeError:
 			streamLabel = None
 		if streamLabel:
@@ -484,19 +964,16 @@ class Encoder(IAccessible):
 		# Load stream labels upon request.
 		if streamLabels is None: loadStreamLabels()
 		# 6.2: Make sure background monitor threads are started if the flag is set.
+		# 18.12: encoder monitor keeps one entry per encoder.
 		if self.backgroundMonitor:
-			threadPool = self.threadPool
-			if self.IAccessibleChildID in threadPool:
-				if not threadPool[self.IAccessibleChildID].is_alive():
-					del threadPool[self.IAccessibleChildID]
-				# If it is indeed alive... Otherwise another thread will be created to keep an eye on this encoder (undesirable).
-				else: return
+			# Otherwise the encoder would be counted again.
+			if encoderMonitor.isMonitoring(self.encoderId): return
 			self.connectStart()
 			encoderMonCount[self.encoderType] += 1
 
 	def reportFocus(self):
 		try:
-			streamLabel = self.getStreamLabel()[0]
+			streamLabel = self.getStreamLabel()
 		except TypeError:
 			streamLabel = None
 		# Announce stream label if it exists.
@@ -515,6 +992,8 @@ class Encoder(IAccessible):
 		"kb:control+f12":"streamLabelEraser",
 		"kb:NVDA+F12":"encoderDateTime",
 		"kb:alt+NVDA+0":"encoderSettings",
+		"kb:control+NVDA+0":"announceEncoderMonitors",
+		"kb:alt+NVDA+1":"encoderDashboard",
 		"kb:control+NVDA+1":"announceEncoderPosition",
 		"kb:control+NVDA+2":"announceEncoderLabel",
 	}
@@ -536,65 +1015,28 @@ class SAMEncoder(Encoder, sysListView32.ListItem):
 		super(SAMEncoder, self)._moveToRow(row)
 		if row is not None: row.setFocus()
 
-	def reportConnectionStatus(self, connecting=False):
+	# 18.12: status classifier (see encoder status state machine).
+	statusClassifier = samStatusClassifier
+
+	def connectionStatus(self):
 		# Keep an eye on the stream's description field for connection changes.
-		# In order to not block NVDA commands, this will be done using a different thread.
-		SPLWin = user32.FindWindowW(u"SPLStudio", None)
-		toneCounter = 0
-		messageCache = ""
-		# Status message flags.
-		idle = False
-		error = False
-		encoding = False
-		alreadyEncoding = False
-		while True:
-			time.sleep(0.001)
-			try:
-				if messageCache != self.description[self.description.find("Status")+8:]:
-					messageCache = self.description[self.description.find("Status")+8:]
-					if not messageCache.startswith("Encoding"):
-						self.encoderStatusMessage(messageCache, self.IAccessibleChildID)
-			except AttributeError:
-				return
-			if messageCache.startswith("Idle"):
-				if alreadyEncoding: alreadyEncoding = False
-				if encoding: encoding = False
-				if not idle:
-					tones.beep(250, 250)
-					idle = True
-					toneCounter = 0
-			elif messageCache.startswith("Error"):
-				# Announce the description of the error.
-				if connecting: connecting= False
-				if not error:
-					error = True
-					toneCounter = 0
-				if alreadyEncoding: alreadyEncoding = False
-			elif messageCache.startswith("Encoding"):
-				if connecting: connecting = False
-				# We're on air, so exit unless told to monitor for connection changes.
-				if not encoding:
-					tones.beep(1000, 150)
-					self.encoderStatusMessage(messageCache, self.IAccessibleChildID)
-				if self.focusToStudio and not encoding:
-					if api.getFocusObject().appModule == "splstudio":
-						continue
-					user32.SetForegroundWindow(user32.FindWindowW(u"TStudioForm", None))
-				# #37 (17.08.1): if run from another function, the message will not be sent, so must be done here.
-				if self.playAfterConnecting and not encoding:
-					# Do not interupt the currently playing track.
-					if winUser.sendMessage(SPLWin, 1024, 0, SPL_TrackPlaybackStatus) == 0:
-						winUser.sendMessage(SPLWin, 1024, 0, SPLPlay)
-				if not encoding: encoding = True
-			else:
-				if alreadyEncoding: alreadyEncoding = False
-				if encoding: encoding = False
-				elif "Error" not in self.description and error: error = False
-				toneCounter+=1
-				if toneCounter%250 == 0 and self.connectionTone:
-					tones.beep(500, 50)
-			if connecting: continue
-			if not self.backgroundMonitor: return
+		try:
+			description = self.description
+		except AttributeError:
+			return None
+		return description[description.find("Status")+8:]
+
+	# All encoder rows come from the encoder list's accessible object, one name and description per row.
+	def encoderRows(self):
+		accessible = self.IAccessibleObject
+		rows = []
+		for childID in range(1, accessible.accChildCount+1):
+			description = accessible.accDescription(childID) or ""
+			statusIndex = description.find("Status: ")
+			descriptionIndex = description.find(", Description: ")
+			status = description[statusIndex+8:descriptionIndex if descriptionIndex > statusIndex else None] if statusIndex > -1 else None
+			rows.append((childID, str(childID), status, None))
+		return rows
 
 	def script_connect(self, gesture):
 		gesture.send()
@@ -657,29 +1099,8 @@ class SAMEncoder(Encoder, sysListView32.ListItem):
 		ui.message(self.description[statusIndex+2:])
 
 	@property
-	def threadPool(self):
-		return SAMMonitorThreads
-
-	@property
-	def streamLabelsMap(self):
-		return SAMStreamLabels
-
-	def getStreamLabel(self, getTitle=False):
-		if str(self.IAccessibleChildID) in SAMStreamLabels:
-			streamLabel = SAMStreamLabels[str(self.IAccessibleChildID)]
-			return streamLabel, self.IAccessibleChildID if getTitle else streamLabel
-		return None, self.IAccessibleChildID if getTitle else None
-
-	def setStreamLabel(self, newStreamLabel):
-		if len(newStreamLabel):
-			SAMStreamLabels[str(self.IAccessibleChildID)] = newStreamLabel
-		else:
-			try:
-				del SAMStreamLabels[str(self.IAccessibleChildID)]
-			except KeyError:
-				pass
-		streamLabels["SAMEncoders"] = SAMStreamLabels
-		streamLabels.write()
+	def encoderTitle(self):
+		return self.IAccessibleChildID
 
 	__gestures={
 		"kb:f9":"connect",
@@ -696,53 +1117,19 @@ class SPLEncoder(Encoder):
 
 	encoderType = "SPL"
 
-	def reportConnectionStatus(self, connecting=False):
-		# Same routine as SAM encoder: use a thread to prevent blocking NVDA commands.
-		SPLWin = user32.FindWindowW(u"SPLStudio", None)
-		attempt = 0
-		messageCache = ""
-		# Status flags.
-		connected = False
-		while True:
-			time.sleep(0.001)
+	# 18.12: status classifier (see encoder status state machine), with transfer rate shown while streaming.
+	statusClassifier = splStatusClassifier
+
+	def connectionStatus(self):
+		try:
+			# An inner try block is required because statChild may say the base class is gone.
 			try:
-				# An inner try block is required because statChild may say the base class is gone.
-				try:
-					statChild = self.children[1]
-				except NotImplementedError:
-					return # Only seen when the encoder dies.
-			except IndexError:
-				return # Don't leave zombie objects around.
-			if messageCache != statChild.name:
-				messageCache = statChild.name
-				if not messageCache: return
-				if "Kbps" not in messageCache:
-					self.encoderStatusMessage(messageCache, self.IAccessibleChildID)
-			if messageCache == "Disconnected":
-				connected = False
-				if connecting: continue
-			elif messageCache == "Connected":
-				connecting = False
-				# We're on air, so exit.
-				if not connected: tones.beep(1000, 150)
-				if self.focusToStudio and not connected:
-					user32.SetForegroundWindow(user32.FindWindowW(u"TStudioForm", None))
-				if self.playAfterConnecting and not connected:
-					if winUser.sendMessage(SPLWin, 1024, 0, SPL_TrackPlaybackStatus) == 0:
-						winUser.sendMessage(SPLWin, 1024, 0, SPLPlay)
-				if not connected: connected = True
-			elif "Unable to connect" in messageCache or "Failed" in messageCache or statChild.name == "AutoConnect stopped.":
-				if connected: connected = False
-			else:
-				if connected: connected = False
-				if not "Kbps" in messageCache:
-					attempt += 1
-					if attempt%250 == 0 and self.connectionTone:
-						tones.beep(500, 50)
-						if attempt>= 500 and statChild.name == "Disconnected":
-							tones.beep(250, 250)
-				if connecting: continue
-			if not self.backgroundMonitor: return
+				statChild = self.children[1]
+			except NotImplementedError:
+				return None # Only seen when the encoder dies.
+		except IndexError:
+			return None # Don't leave zombie objects around.
+		return statChild.name or None
 
 	def script_connect(self, gesture):
 		# Same as SAM's connection routine, but this time, keep an eye on self.name and a different connection flag.
@@ -756,6 +1143,20 @@ class SPLEncoder(Encoder):
 		if not self.backgroundMonitor: self.connectStart(connecting=True)
 	script_connect.__doc__=_("Connects to a streaming server.")
 
+	# 18.12: transfer rate is shown as status text while streaming.
+	_transferRatePattern = re.compile(r"(\d+(?:\.\d+)?)\s*Kbps", re.IGNORECASE)
+
+	def transferRate(self, status):
+		match = self._transferRatePattern.search(status)
+		return float(match.group(1)) if match else None
+
+	# Encoder settings (title) and status (or transfer rate) columns of all encoders are read in one pass.
+	def encoderRows(self):
+		rows = []
+		for pos, (title, status) in enumerate(_listViewRows(self, (0, 1)), 1):
+			rows.append((pos, title, status, self.transferRate(status) if status else None))
+		return rows
+
 	# Announce SPL Encoder columns: encoder settings and transfer rate.
 	def script_announceEncoderSettings(self, gesture):
 		ui.message(_("Encoder Settings: {setting}").format(setting = self.children[0].name))
@@ -764,29 +1165,8 @@ class SPLEncoder(Encoder):
 		ui.message(_("Transfer Rate: {transferRate}").format(transferRate = self.children[1].name))
 
 	@property
-	def threadPool(self):
-		return SPLMonitorThreads
-
-	@property
-	def streamLabelsMap(self):
-		return SPLStreamLabels
-
-	def getStreamLabel(self, getTitle=False):
-		if str(self.IAccessibleChildID) in SPLStreamLabels:
-			streamLabel = SPLStreamLabels[str(self.IAccessibleChildID)]
-			return streamLabel, self.firstChild.name if getTitle else streamLabel
-		return (None, self.firstChild.name) if getTitle else None
-
-	def setStreamLabel(self, newStreamLabel):
-		if len(newStreamLabel):
-			SPLStreamLabels[str(self.IAccessibleChildID)] = newStreamLabel
-		else:
-			try:
-				del SPLStreamLabels[str(self.IAccessibleChildID)]
-			except KeyError:
-				pass
-		streamLabels["SPLEncoders"] = SPLStreamLabels
-		streamLabels.write()
+	def encoderTitle(self):
+		return self.firstChild.name
 
 	__gestures={
 		"kb:f9":"connect",
@@ -0,0 +1,116 @@
+# StationPlaylist encoder status
+# An app module and global plugin package for NVDA
+# Copyright 2018 Joseph Lee and others, released under GPL.
+# Provides the encoder status state machine used by SAM and SPL encoder support (see encoders module).
+# Status text is classified into one of the below states using a pattern compiled once for each encoder type.
+# Actions to be performed as status moves from one state to another come from a table shared by all encoder types.
+# This module must not depend on NVDA or wxPython so status handling can be checked anywhere (run this module to do so).
+
+import sys
+import re
+
+encoderStates = ("connecting", "onAir", "idle", "error")
+
+class EncoderStatusClassifier(object):
+	"""Classifies encoder status text with a single precompiled pattern built from (state, pattern) pairs.
+	If more than one pattern matches, the one matching earliest in status text wins.
+	Status text not matched by any pattern means the encoder is connecting.
+	"""
+
+	def __init__(self, *rules):
+		self._states = {}
+		patterns = []
+		for pos, (state, pattern) in enumerate(rules):
+			self._states["s%s"%pos] = state
+			patterns.append("(?P<s%s>%s)"%(pos, pattern))
+		self._pattern = re.compile("|".join(patterns))
+
+	def classify(self, status):
+		match = self._pattern.search(status)
+		return self._states[match.lastgroup] if match else "connecting"
+
+class EncoderStatusMachine(object):
+	"""Looks up actions for each change of encoder state (including the first status seen, where the previous state is None).
+	Entry actions are performed when moving into a state, and steady actions are performed on each sample while the state stays the same.
+	"""
+
+	entryActions = {
+		"connecting": ("resetConnectionTone",),
+		"onAir": ("stopConnecting", "onAirTone", "announce", "focusToStudio", "playAfterConnecting"),
+		"idle": ("idleTone",),
+		"error": ("stopConnecting",),
+	}
+	steadyActions = {
+		"connecting": ("connectionTone",),
+	}
+
+	def __init__(self):
+		self.transitions = {}
+		for previous in (None,) + encoderStates:
+			for current in encoderStates:
+				self.transitions[(previous, current)] = self.steadyActions.get(current, ()) if previous == current else self.entryActions[current]
+
+	def actions(self, previous, current):
+		return self.transitions[(previous, current)]
+
+encoderStatusMachine = EncoderStatusMachine()
+
+# Status classifiers for SAM and SPL encoders.
+# SPL encoders show transfer rate while streaming.
+samStatusClassifier = EncoderStatusClassifier(("onAir", "^Encoding"), ("idle", "^Idle"), ("error", "^Error"))
+splStatusClassifier = EncoderStatusClassifier(("onAir", "^Connected$|Kbps"), ("idle", "^Disconnected$"), ("error", "Unable to connect|Failed|^AutoConnect stopped\\.$"))
+
+# Self-test.
+# Recorded status text for each encoder type, along with expected state and actions as seen by encoder support when status text is sampled in this order.
+# Status sequences follow what encoders go through when connecting, streaming, failing and reconnecting.
+statusRecordings = {
+	"SAM": (samStatusClassifier, (
+		("Idle", "idle", ("idleTone",)),
+		("Connecting...", "connecting", ("resetConnectionTone",)),
+		("Connecting...", "connecting", ("connectionTone",)),
+		("Encoding (128 kbps)", "onAir", ("stopConnecting", "onAirTone", "announce", "focusToStudio", "playAfterConnecting")),
+		("Encoding (128 kbps)", "onAir", ()),
+		("Error: could not connect to server", "error", ("stopConnecting",)),
+		("Error: could not connect to server", "error", ()),
+		("Idle", "idle", ("idleTone",)),
+		("Encoding (64 kbps)", "onAir", ("stopConnecting", "onAirTone", "announce", "focusToStudio", "playAfterConnecting")),
+	)),
+	"SPL": (splStatusClassifier, (
+		("Disconnected", "idle", ("idleTone",)),
+		("Connecting", "connecting", ("resetConnectionTone",)),
+		("Connecting", "connecting", ("connectionTone",)),
+		("Connected", "onAir", ("stopConnecting", "onAirTone", "announce", "focusToStudio", "playAfterConnecting")),
+		("128 Kbps", "onAir", ()),
+		("Unable to connect to server", "error", ("stopConnecting",)),
+		("AutoConnect stopped.", "error", ()),
+		("Connecting", "connecting", ("resetConnectionTone",)),
+		("Failed to connect", "error", ("stopConnecting",)),
+		("Disconnected", "idle", ("idleTone",)),
+		("Connected", "onAir", ("stopConnecting", "onAirTone", "announce", "focusToStudio", "playAfterConnecting")),
+	)),
+}
+
+# Returns a list of messages describing status text not handled as expected.
+def selfTest(recordings=None, machine=None):
+	if recordings is None: recordings = statusRecordings
+	if machine is None: machine = encoderStatusMachine
+	failures = []
+	for encoderType, (classifier, recording) in sorted(recordings.items()):
+		previous = None
+		for pos, (status, expectedState, expectedActions) in enumerate(recording):
+			state = classifier.classify(status)
+			actions = machine.actions(previous, state)
+			if state != expectedState or tuple(actions) != tuple(expectedActions):
+				failures.append("%s status %s (%r): expected %s %r, got %s %r"%(encoderType, pos, status, expectedState, expectedActions, state, actions))
+			previous = state
+	return failures
+
+def _main(args):
+	failures = selfTest()
+	for failure in failures:
+		print(failure)
+	print("%s encoder status checks failed"%len(failures) if failures else "All encoder status checks passed")
+	return 1 if failures else 0
+
+if __name__ == "__main__":
+	sys.exit(_main(sys.argv[1:]))